@@ -0,0 +1,183 @@
+"""
+Asyncio game loop that overlaps device I/O.
+
+The hardware drivers are blocking, so each gets a thin async adapter that
+runs its calls on a worker thread. A lock per device keeps calls on one
+serial port in order. Nothing later in a turn waits on the plotter
+finishing a move: the board state is updated as soon as the move is
+planned. So AsyncGame starts each plan in the background and only waits
+for it before the next plan needs the head. While pieces are moving, the
+panel can already prompt the next roll and play a victory celebration.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from game.camera import DiceCamera
+from game.constants import (
+    DICE_READ_ATTEMPTS,
+    ENCODE_PLAYER_COLOR,
+    PlayerColor,
+    ROLL_AGAIN,
+)
+from game.dice import DiceReader, DiceReading
+from game.game import Game
+from game.plan import Plan, PlanExecutor
+from game.player import Player
+from game.serial_protocol import ControlPanelProtocol
+
+
+class AsyncControlPanel:
+    """Async adapter over ControlPanelProtocol."""
+
+    def __init__(self, cp: ControlPanelProtocol):
+        self.cp = cp
+        self._lock = asyncio.Lock()
+
+    async def wait_for_config(self, timeout: float = 60.0):
+        async with self._lock:
+            return await asyncio.to_thread(self.cp.wait_for_config, timeout)
+
+    async def roll(self, color: PlayerColor, timeout: float = 35.0) -> bool:
+        """Request a roll and wait for the dice to stop; False on timeout."""
+        async with self._lock:
+            await asyncio.to_thread(self.cp.send_roll_request, color)
+            return await asyncio.to_thread(self.cp.wait_for_dice_complete, timeout)
+
+    async def send_victory(self, color: PlayerColor) -> None:
+        # only the message needs the port: the panel plays the celebration on
+        # its own and takes the next roll request once it is over
+        async with self._lock:
+            await asyncio.to_thread(self.cp.send_victory, color, False)
+
+
+class AsyncPlotter:
+    """Async adapter that runs plans on a Plotter one at a time."""
+
+    def __init__(self, executor: PlanExecutor):
+        self.executor = executor
+        self._lock = asyncio.Lock()
+
+    async def run(self, plan: Plan) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self.executor.run, plan)
+
+    async def call(self, fn, *args):
+        """Run any other plotter work in turn with the plans."""
+        async with self._lock:
+            return await asyncio.to_thread(fn, *args)
+
+
+class AsyncDiceCamera:
+    """Async adapter over DiceCamera and its DiceReader."""
+
+    def __init__(self, cam: DiceCamera, dice: DiceReader):
+        self.cam = cam
+        self.dice = dice
+
+    async def read_die(self, after: float) -> DiceReading:
+        return await asyncio.to_thread(self.dice.read, after)
+
+    def wake(self) -> None:
+        # only sets a flag for the capture loop; no need for a thread
+        self.cam.wake()
+
+    def rest(self) -> None:
+        self.cam.rest()
+
+
+class AsyncGame(Game):
+    """Game whose turn loop overlaps plotter motion with panel and camera I/O."""
+
+    def _play(self) -> None:
+        asyncio.run(self._play_async())
+
+    async def _play_async(self) -> None:
+        panel = AsyncControlPanel(self.cp)
+        plotter = AsyncPlotter(self.board.executor)
+        cam = AsyncDiceCamera(self.cam, self.dice)
+        motion: Optional[asyncio.Task] = None
+        background: list[asyncio.Task] = []
+
+        try:
+            while not self.game_over and self.players_manager.players:
+                if not self.cam.has_frame():
+                    await asyncio.sleep(0.01)
+                    continue
+
+                print(self.board.board)
+                player: Player = self.players_manager.players[
+                    self.players_manager.current_index
+                ]
+                self.roll_value = ROLL_AGAIN
+
+                moved = 0
+                while self.roll_value == ROLL_AGAIN:
+                    print("GAME: rolling...")
+                    if self.speculative:
+                        motion = asyncio.create_task(
+                            self._speculate_async(plotter, motion, player)
+                        )
+                    self.roll_value = await self._roll_async(panel, cam, player)
+                    # the next plan starts from where the last one leaves the head
+                    if motion is not None:
+                        await motion
+                        # the pieces are where the board model says only now
+                        await asyncio.to_thread(self.verify_board)
+                    print("GAME: moving...")
+                    plan, result = self.board.prepare_move(player, self.roll_value)
+                    motion = asyncio.create_task(plotter.run(plan))
+                    moved = result.moved
+                # runs after the turn's last plan, before the next one starts
+                background.append(
+                    asyncio.create_task(plotter.call(self.board.plotter.save_state))
+                )
+
+                if moved and player.isHome():
+                    color = ENCODE_PLAYER_COLOR[player.color]
+                    background.append(asyncio.create_task(panel.send_victory(color)))
+                    self.players_manager.players.remove(player)
+                    self.game_over = self.board.check_game_over(
+                        self.players_manager.players
+                    )
+
+                self.players_manager.next_player()
+
+            if motion is not None:
+                await motion
+                # the last plan has no next prepare_move to check it before
+                await asyncio.to_thread(self.verify_board)
+            await asyncio.gather(*background)
+        finally:
+            # worker threads can't be cancelled; let them finish before cleanup
+            pending = [t for t in [motion, *background] if t is not None]
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _speculate_async(
+        self, plotter: AsyncPlotter, previous: Optional[asyncio.Task], player: Player
+    ) -> None:
+        """Game._speculate, once the head has finished the previous plan."""
+        if previous is not None:
+            await previous
+        await plotter.call(self._speculate, player)
+
+    async def _roll_async(
+        self, panel: AsyncControlPanel, cam: AsyncDiceCamera, player: Player
+    ) -> int:
+        """Async version of Game.roll."""
+        cam.wake()
+        try:
+            if not await panel.roll(ENCODE_PLAYER_COLOR[player.color]):
+                raise Exception("roll failed")
+            # only frames captured after the panel reported the roll show the result
+            after = time.monotonic()
+            for _ in range(DICE_READ_ATTEMPTS):
+                reading = await cam.read_die(after)
+                print("Dice:", reading)
+                if reading.ok:
+                    return reading.value
+                after = time.monotonic()
+            raise RuntimeError("Could not read the die")
+        finally:
+            cam.rest()
@@ -2,6 +2,31 @@ from game.player import Player
 from typing import Optional
 from game.constants import ROLL_AGAIN, BOARD_X, BOARD_Y, DIRECTION_MAP, MAGNET_PIN
 from game.plotter import Plotter
+from game.state import (
+    BoardState,
+    NUM_SEATS,
+    NO_PIECE,
+    DEFAULT_HOMES,
+    cell_index,
+    seat_of,
+)
+from game.zobrist import MoveCache, MoveAnalysis
+from game.plan import Plan, PlanExecutor, TRAVEL
+from game import optimizer, rules, track, zobrist
+
+
+class _Speculation:
+    """A roll planned ahead of time, valid while the board and head are unchanged."""
+
+    __slots__ = ("zhash", "seat", "start", "plan", "result", "after")
+
+    def __init__(self, zhash, seat, start, plan, result, after):
+        self.zhash = zhash
+        self.seat = seat
+        self.start = start  # head cell the optimized plan starts from
+        self.plan = plan
+        self.result = result
+        self.after = after  # board snapshot once the plan has run
 
 
 class Board:
@@ -9,14 +34,30 @@ class Board:
         self.board: list[list[Optional[Player]]] = [
             [None] * BOARD_Y for _ in range(BOARD_X)
         ]
-        self.plotter = Plotter(magnet_pin=MAGNET_PIN)
-        self.plotter.go_to((0, 0))
+        # the plotter starts on a known cell, so plans can begin from there;
+        # streamed, so the moves between magnet switches queue back to back
+        self.plotter = Plotter(magnet_pin=MAGNET_PIN, streaming=True)
+        # Zobrist hash of the position, kept current by low_level_move and move
+        self.zhash: int = 0
+        self.move_cache = MoveCache()
+        self.executor = PlanExecutor(self.plotter)
+        # plan being compiled; low_level_move records into it
+        self._plan: Optional[Plan] = None
+        # roll -> plan compiled by speculate() for the current turn
+        self._speculation: dict[int, _Speculation] = {}
 
     def populate(self, players: list[Player]):
         """Place all players on the board at their home positions."""
         for p in players:
             x, y = p.pos
             self.board[x][y] = p
+        self.rehash()
+
+    def rehash(self) -> None:
+        """Recompute the Zobrist hash from scratch after the grid is replaced."""
+        self.zhash = zobrist.hash_pieces(
+            (seat, p.pos, p.locked, p.home) for seat, p in self._pieces().items()
+        )
 
     def test_move(self, players: list[Player], roll: int, player: Player) -> int:
         """Test helper: reset board to provided state, then move the selected player."""
@@ -34,127 +75,252 @@ class Board:
                     f"multiple players share position {p.pos}: {self.board[x][y]} and {p}"
                 )
             self.board[x][y] = p
+        self.rehash()
 
         return self.move(player, roll)
 
-    def _track_step(self, pos: tuple[int, int], roll: int) -> tuple[int, int]:
-        x, y = pos
-        while roll > 0:
-            if x == 0 and 0 <= y < 4:  # bottom
-                move = min(roll, 4 - y)
-                roll -= move
-                y += move
-            if y == 4 and 0 <= x < 7 and roll > 0:  # left
-                move = min(roll, 7 - x)
-                roll -= move
-                x += move
-            if x == 7 and 0 < y <= 4 and roll > 0:  # top
-                move = min(roll, y)
-                roll -= move
-                y -= move
-            if y == 0 and 0 < x <= 7 and roll > 0:  # left
-                move = min(roll, x)
-                roll -= move
-                x -= move
-        return (x, y)
-
     def _track_move(self, p: Player, roll: int) -> None:
-        x, y = p.pos
-        while roll > 0:
-            if x == 0 and 0 <= y < 4:  # bottom
-                move = min(roll, 4 - y)
-                roll -= move
-                self.low_level_move(p, "LEFT", move)
-                x, y = p.pos
-            if y == 4 and 0 <= x < 7 and roll > 0:  # left
-                move = min(roll, 7 - x)
-                roll -= move
-                self.low_level_move(p, "LEFT", move)
-                x, y = p.pos
-            if x == 7 and 0 < y <= 4 and roll > 0:  # top
-                move = min(roll, y)
-                roll -= move
-                self.low_level_move(p, "LEFT", move)
-                x, y = p.pos
-            if y == 0 and 0 < x <= 7 and roll > 0:  # left
-                move = min(roll, x)
-                roll -= move
-                self.low_level_move(p, "LEFT", move)
-                x, y = p.pos
-
-    def _calc_distance(self, start, stop) -> int:
-        distance = 0
-        while start != stop:
-            start = self._track_step(start, 1)
-            distance += 1
-        return distance
+        # one LEFT carry per straight run, breaking at each corner
+        for run in track.segments(p.pos, roll):
+            self.low_level_move(p, "LEFT", run)
+
+    def to_state(self) -> BoardState:
+        """Snapshot the pieces on the board as a hardware-free BoardState."""
+        pos = bytearray([NO_PIECE] * NUM_SEATS)
+        grid = bytearray(BOARD_X * BOARD_Y)
+        locked = 0
+        home = list(DEFAULT_HOMES)
+        for seat, p in self._pieces().items():
+            pos[seat] = track.ordinal(p.pos)
+            grid[cell_index(p.pos)] = seat + 1
+            if p.locked:
+                locked |= 1 << seat
+            home[seat] = track.ordinal(p.home)
+        return BoardState(bytes(pos), locked, tuple(home), bytes(grid))
+
+    def load_state(self, state: BoardState, players: list[Player]) -> None:
+        """
+        Place players where a BoardState says they are, without moving the plotter.
+        Players whose seat has no piece in the state are taken off the board.
+        """
+        self.board = [[None] * BOARD_Y for _ in range(BOARD_X)]
+        for p in players:
+            seat = seat_of(p.color)
+            pos = state.position(seat)
+            if pos is None:
+                continue
+            p.pos = pos
+            p.locked = state.is_locked(seat)
+            self.board[pos[0]][pos[1]] = p
+        self.rehash()
+
+    def _pieces(self) -> dict[int, Player]:
+        pieces: dict[int, Player] = {}
+        for column in self.board:
+            for p in column:
+                if p is not None:
+                    pieces[seat_of(p.color)] = p
+        return pieces
 
     def get_move_desc(
         self, player: Player, roll: int
     ) -> Optional[tuple[tuple[int, int], tuple[int, int]]]:
         """Calculate the move description (from position, to position) for a given roll."""
-        if player.locked:
-            player.locked = roll != ROLL_AGAIN
-            return None
-        target = self._track_step(player.pos, roll)
-        t_piece = self.board[target[0]][target[1]]
-        if t_piece and self.board[t_piece.home[0]][t_piece.home[1]]:
-            # can't capture because home is blocked
-            return None
-        return (player.pos, target)
-
-    def move(self, p: Player, roll: int, captured: bool = False) -> int:
+        return self.analyze(player, roll).desc
+
+    def analyze(self, player: Player, roll: int) -> MoveAnalysis:
         """
-        returns true if the player moved to new space
+        Where a roll takes the player and what blocks the way, memoized on the
+        Zobrist hash of the current position.
         """
-        desc = self.get_move_desc(p, roll)
-        if not desc:
-            return 0
-        target = desc[1]
+        key = (self.zhash, seat_of(player.color), roll)
+        entry = self.move_cache.get(key)
+        if entry is None:
+            entry = self._analyze(player, roll)
+            self.move_cache.put(key, entry)
+        return entry
 
-        # can decrease captured step until clear
-        if captured:
-            while self.board[target[0]][target[1]]:
-                roll -= 1
-                target = self._track_step(p.pos, roll)
-
-        # is piece on target (never true for captured piece)?
-        piece = self.board[target[0]][target[1]]
-        if piece:
-            # move target home (garunteed empty)
-            distance = self._calc_distance(piece.pos, piece.home)
-            while distance > 6:
-                traveled = self.move(piece, 6, captured=True)
-                distance -= traveled
-            if distance > 0:
-                self.move(piece, distance, captured=True)
-            piece.locked = True
-
-        # can now move the current piece
-        # start by identifying scenario
+    def _analyze(self, player: Player, roll: int) -> MoveAnalysis:
+        desc = None
+        target = rules.target(self.to_state(), seat_of(player.color), roll)
+        if target is not None:
+            desc = (player.pos, track.RING[target])
+
+        # identify the scenario needed to clear the path
         blockers = []
-        sides: set[int] = set()
+        sides: set[tuple[bool, bool]] = set()
         corners: int = 0
-        i: int = 1
-        t = None
-        while t != target:
-            t = self._track_step(p.pos, i)
-            piece = self.board[t[0]][t[1]]
-            if piece:
-                blockers.append(piece)
-                if self._onCorner(piece):
+        for t in track.path(player.pos, roll):
+            if self.board[t[0]][t[1]]:
+                blockers.append(t)
+                if track.CORNER[t[0]][t[1]]:
                     corners += 1
                 else:
                     # value doesn't matter here, just uniqueness
-                    sides.add(self.side_perspective_transformation(piece))
-            i += 1
+                    sides.add(track.SIDE[t[0]][t[1]])
         if not blockers:
-            self._move_alpha(p, roll)
+            scenario = "alpha"
         elif len(sides) == 1 and corners == 0:
-            self._move_A(p, roll, blockers)
+            scenario = "A"
         elif len(sides) == 2 and corners == 0:
-            self._move_F(p, roll, blockers)
+            scenario = "F"
         elif len(blockers) == 1 and corners == 1:
+            scenario = "corner"
+        else:
+            scenario = None
+        return MoveAnalysis(desc, scenario, tuple(blockers))
+
+    def move(self, p: Player, roll: int) -> int:
+        """
+        Apply the rules for a roll and carry out the result on the plotter.
+        Returns the number of cells the player moved (0 if it stayed put).
+        """
+        plan, result = self.prepare_move(p, roll)
+        self.executor.run(plan)
+        return result.moved
+
+    def prepare_move(self, p: Player, roll: int) -> tuple[Plan, rules.MoveResult]:
+        """
+        Apply the rules for a roll and return the optimized plan that carries it
+        out, without running it. The board is updated right away; the plan must
+        run before the next one is prepared, since it starts from the head's
+        current cell.
+        """
+        spec = self._speculation.get(roll)
+        self._speculation = {}
+        if (
+            spec is not None
+            and spec.zhash == self.zhash
+            and spec.seat == seat_of(p.color)
+            and spec.start == self.plotter.current_index
+        ):
+            print("PLAN: using speculative plan")
+            self._restore(spec.after)
+            return spec.plan, spec.result
+
+        plan, result = self.plan_move(p, roll)
+        start = self.plotter.current_index
+        coords = self.plotter.coords
+        optimized = optimizer.optimize(plan, start, coords)
+        print("PLAN:", optimizer.report(plan, optimized, start, coords))
+        return optimized, result
+
+    def speculate(self, p: Player) -> Optional[tuple[int, int]]:
+        """
+        Compile and optimize p's move for every roll before the dice land, and
+        return the cell the head should wait on: the one closest, on average,
+        to where each plan starts (p's piece or its first blocker). Each plan
+        assumes the head waits there. prepare_move uses them while the board
+        and head are unchanged. Returns None if no roll needs the plotter.
+        """
+        self._speculation = {}
+        compiled = {}
+        for roll in range(1, ROLL_AGAIN + 1):
+            before = self._snapshot()
+            try:
+                plan, result = self.plan_move(p, roll)
+            except RuntimeError:
+                continue  # plan_move left the board untouched
+            compiled[roll] = (plan, result, self._snapshot())
+            self._restore(before)
+
+        firsts = [
+            next(op.target for op in plan if op.kind == TRAVEL)
+            for plan, _, _ in compiled.values()
+            if len(plan)
+        ]
+        coords = self.plotter.coords
+        start = self.plotter.current_index
+        if firsts:
+            start = min(
+                sorted(set(firsts)),
+                key=lambda c: sum(coords.move_time(c, t) for t in firsts),
+            )
+
+        seat = seat_of(p.color)
+        for roll, (plan, result, after) in compiled.items():
+            optimized = optimizer.optimize(plan, start, coords)
+            self._speculation[roll] = _Speculation(
+                self.zhash, seat, start, optimized, result, after
+            )
+        return start if firsts else None
+
+    def plan_move(
+        self,
+        p: Player,
+        roll: int,
+        dry_run: bool = False,
+    ) -> tuple[Plan, rules.MoveResult]:
+        """
+        Compile a roll into the Plan that carries it out, without moving the
+        plotter. The board is updated as if the plan had run, unless dry_run is
+        set or compiling fails, in which case it is left untouched.
+        """
+        result = rules.apply_roll(self.to_state(), seat_of(p.color), roll)
+        snapshot = self._snapshot()
+        self._plan = Plan()
+        try:
+            if result.moved:
+                pieces = self._pieces()
+                for seat in result.captures:
+                    self._send_home(pieces[seat])
+                self._carry(p, result.moved)
+
+            # locks are the only thing the hardware moves don't already reflect
+            for seat, piece in self._pieces().items():
+                locked = result.state.is_locked(seat)
+                if piece.locked != locked:
+                    piece.locked = locked
+                    self.zhash ^= zobrist.LOCK[seat]
+            plan = self._plan
+        except BaseException:
+            self._restore(snapshot)
+            raise
+        finally:
+            self._plan = None
+        if dry_run:
+            self._restore(snapshot)
+        return plan, result
+
+    def _snapshot(self) -> tuple[list[tuple[Player, tuple[int, int], bool]], int]:
+        pieces = [(p, p.pos, p.locked) for p in self._pieces().values()]
+        return pieces, self.zhash
+
+    def _restore(
+        self, snapshot: tuple[list[tuple[Player, tuple[int, int], bool]], int]
+    ) -> None:
+        pieces, zhash = snapshot
+        self.board = [[None] * BOARD_Y for _ in range(BOARD_X)]
+        for p, pos, locked in pieces:
+            p.pos = pos
+            p.locked = locked
+            self.board[pos[0]][pos[1]] = p
+        self.zhash = zhash
+
+    def _send_home(self, piece: Player) -> None:
+        """Carry a captured piece forward to its home (guaranteed empty)."""
+        distance = track.distance(piece.pos, piece.home)
+        while distance > 0:
+            # hop at most ROLL_AGAIN cells, shortening the hop until it lands clear
+            hop = min(distance, ROLL_AGAIN)
+            target = track.step(piece.pos, hop)
+            while self.board[target[0]][target[1]]:
+                hop -= 1
+                target = track.step(piece.pos, hop)
+            self._carry(piece, hop)
+            distance -= hop
+
+    def _carry(self, p: Player, roll: int) -> None:
+        """Carry a piece `roll` cells along the track, moving blockers aside."""
+        analysis = self.analyze(p, roll)
+        blockers = [self.board[x][y] for x, y in analysis.blockers]
+        if analysis.scenario == "alpha":
+            self._move_alpha(p, roll)
+        elif analysis.scenario == "A":
+            self._move_A(p, roll, blockers)
+        elif analysis.scenario == "F":
+            self._move_F(p, roll, blockers)
+        elif analysis.scenario == "corner":
             self._move_corner(p, roll, blockers[0])
         else:
             raise RuntimeError("Cannot handle scenario with blockers")
@@ -163,39 +329,46 @@ class Board:
         self._track_move(p, roll)
 
     def _move_A(self, p: Player, roll: int, blockers: list[Player]):
+        stage = self._new_stage()
         for b in blockers:
             p_trans = self.side_perspective_transformation(b)
-            self.low_level_move(b, "UP", 2, p_trans)
+            self.low_level_move(b, "UP", 2, p_trans, stage)
         self._track_move(p, roll)
+        stage = self._new_stage()
         for b in blockers:
-            self.low_level_move(b, "DOWN", 2, p_trans)
+            self.low_level_move(b, "DOWN", 2, p_trans, stage)
 
     def _move_F(self, p: Player, roll: int, blockers: list[Player]):
         undo = []
+        stage = self._new_stage()
         for b in blockers:
             p_trans = self.side_perspective_transformation(b)
-            self.low_level_move(b, "UP", 3, p_trans)
+            self.low_level_move(b, "UP", 3, p_trans, stage)
             undo.append((b, "DOWN", p_trans))
 
         self._track_move(p, roll)
 
+        stage = self._new_stage()
         for b, direction, p_trans in undo:
-            self.low_level_move(b, direction, 3, p_trans)
+            self.low_level_move(b, direction, 3, p_trans, stage)
 
     def _move_corner(self, p: Player, roll: int, b: Player):
         p_trans = self.side_perspective_transformation(b)
-        self.low_level_move(b, "LEFT", 1, p_trans) # left
-        self.low_level_move(b, "UP", 2, p_trans) # UP
+        self.low_level_move(b, "LEFT", 1, p_trans)  # left
+        self.low_level_move(b, "UP", 2, p_trans)  # UP
 
         self._track_move(p, roll)
 
         # return
-        self.low_level_move(b, "DOWN", 1, p_trans) # left
-        self.low_level_move(b, "RIGHT", 1, p_trans) # up
-        self.low_level_move(b, "DOWN", 1, p_trans) # left
+        self.low_level_move(b, "DOWN", 1, p_trans)  # left
+        self.low_level_move(b, "RIGHT", 1, p_trans)  # up
+        self.low_level_move(b, "DOWN", 1, p_trans)  # left
+
+    def _new_stage(self) -> int:
+        return self._plan.new_stage() if self._plan is not None else 0
 
     def _onCorner(self, p: Player) -> bool:
-        return p.pos in [(0, 0), (0, 4), (7, 4), (7, 0)]
+        return track.CORNER[p.pos[0]][p.pos[1]]
 
     def check_game_over(self, players: list[Player]) -> bool:
         """Return True if only 1 player remains."""
@@ -206,14 +379,7 @@ class Board:
         (swap x/y, swap sign)
         """
         x, y = player.pos
-        if x == 0 and y < 4:  # Bottom
-            return (False, False)
-        elif x == 7 and y > 0:  # Top
-            return (False, True)
-        elif y == 0 and x > 0:  # Right
-            return (True, False)
-        else:  # Left (y == 0)
-            return (True, True)
+        return track.SIDE[x][y]
 
     def direction_transformation(
         self, p_trans: tuple[bool, bool], direction: str
@@ -256,7 +422,13 @@ class Board:
         direction: str,
         step: int,
         p_trans: Optional[tuple[bool, bool]] = None,
+        stage: Optional[int] = None,
     ):
+        """
+        Record a single-axis carry of one piece into the plan being compiled
+        (or run it straight away outside of plan_move) and update the board.
+        Moves in the same stage must not depend on each other.
+        """
         if not p_trans:
             p_trans = self.side_perspective_transformation(player)
         # calculate target
@@ -270,14 +442,14 @@ class Board:
         else:  # move along x-axis
             target = (x + sign * step, y)
 
-        p = self.plotter
-        # go to player
-        print("PLOTTER: moving to player at", player.pos)
-        p.go_to((x, y))
+        plan = self._plan if self._plan is not None else Plan()
+        if stage is None:
+            stage = plan.new_stage()
+        plan.carry(seat_of(player.color), (x, y), target, stage)
+        if plan is not self._plan:
+            self.executor.run(plan)
 
-        # carry to target
-        print("PLOTTER: carrying to", target)
         self.board[x][y] = None
-        p.carry_to(target)
         player.pos = target
         self.board[target[0]][target[1]] = player
+        self.zhash ^= zobrist.move_key(seat_of(player.color), (x, y), target)
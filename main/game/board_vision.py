@@ -0,0 +1,196 @@
+"""
+Board occupancy from a camera looking down at the board.
+
+Each of the BOARD_X x BOARD_Y cells maps to a fixed square region of the
+camera frame. The regions are computed once from the calibrated pixel
+positions of the four corner cells, so skew and perspective are handled.
+A cell holds a piece when enough of its region is saturated and close in
+hue to one of the piece colours.
+
+Moving a piece changes only two or three cells. So update() compares each
+cell's pixels with those it was last classified on, and reclassifies only
+the cells that changed. Checking the board after a move then costs far less
+than a frame time. diff() compares what the camera saw with Board.board.
+
+Calibration file (JSON), "corners" required:
+
+    {
+        "camera": 1,
+        "resolution": [1280, 720],
+        "corners": [[98, 132], [1181, 138], [1176, 610], [95, 604]],
+        "roi": 0.5
+    }
+
+"corners" are the pixel centres of cells (0, 0), (BOARD_X - 1, 0),
+(BOARD_X - 1, BOARD_Y - 1) and (0, BOARD_Y - 1), in the whole, uncropped
+frames the board camera delivers at "resolution" (width, height). The board
+is wider than it is deep, so it is never squared up like the die. "roi" is
+the side of each cell's region as a share of the cell pitch.
+"""
+
+import json
+import os
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from game.constants import (
+    BOARD_CELL_CHANGE,
+    BOARD_VISION_FILE,
+    BOARD_X,
+    BOARD_Y,
+    PIECE_HUE_TOLERANCE,
+    PIECE_HUES,
+    PIECE_MIN_FILL,
+    PIECE_MIN_SATURATION,
+    PIECE_MIN_VALUE,
+)
+from game.player import Player
+
+# hue bins (OpenCV hue, 0-179) that count towards each piece colour
+_HUE_BINS = {
+    color: (np.arange(-PIECE_HUE_TOLERANCE, PIECE_HUE_TOLERANCE + 1) + hue) % 180
+    for color, hue in PIECE_HUES.items()
+}
+
+
+class CellDiff:
+    """A cell where the camera disagrees with the board model."""
+
+    __slots__ = ("cell", "expected", "seen")
+
+    def __init__(
+        self, cell: tuple[int, int], expected: Optional[str], seen: Optional[str]
+    ):
+        self.cell = cell
+        self.expected = expected  # piece colour per Board.board, None if empty
+        self.seen = seen  # piece colour the camera sees, None if empty
+
+    def __repr__(self) -> str:
+        return f"<CellDiff {self.cell} expected={self.expected} seen={self.seen}>"
+
+
+class BoardVision:
+    def __init__(
+        self,
+        corners: list[tuple[float, float]],
+        roi: float = 0.5,
+        camera: int = 1,
+        resolution: tuple[int, int] = (1280, 720),
+    ):
+        """
+        Parameters:
+        - corners: frame pixel centres of the four corner cells (see module doc).
+        - roi: side of each cell's region as a share of the cell pitch.
+        - camera, resolution: board camera index and its (width, height) in
+          pixels, which the corners were calibrated at.
+        """
+        self.camera = camera
+        self.resolution = resolution
+
+        board = np.float32(
+            [[0, 0], [BOARD_X - 1, 0], [BOARD_X - 1, BOARD_Y - 1], [0, BOARD_Y - 1]]
+        )
+        to_frame = cv2.getPerspectiveTransform(board, np.float32(corners))
+        grid = np.float32([[[x, y] for y in range(BOARD_Y)] for x in range(BOARD_X)])
+        centres = cv2.perspectiveTransform(grid.reshape(-1, 1, 2), to_frame)
+        centres = centres.reshape(BOARD_X, BOARD_Y, 2)
+
+        # [x][y] -> (rows, cols) slices of the cell's square region
+        self.rois: list[list[tuple[slice, slice]]] = []
+        for x in range(BOARD_X):
+            column = []
+            for y in range(BOARD_Y):
+                cx, cy = centres[x, y]
+                half = max(1, int(roi * _pitch(centres, x, y) / 2))
+                column.append(
+                    (
+                        slice(max(0, int(cy) - half), int(cy) + half),
+                        slice(max(0, int(cx) - half), int(cx) + half),
+                    )
+                )
+            self.rois.append(column)
+
+        # what the camera last saw per cell, indexed like Board.board
+        self.cells: list[list[Optional[str]]] = [
+            [None] * BOARD_Y for _ in range(BOARD_X)
+        ]
+        # grey pixels each cell was last classified on
+        self._grey: list[list[Optional[np.ndarray]]] = [
+            [None] * BOARD_Y for _ in range(BOARD_X)
+        ]
+
+    @classmethod
+    def load(cls, path: str = BOARD_VISION_FILE) -> Optional["BoardVision"]:
+        """Read a calibration file; None (vision off) if there isn't one."""
+        if not os.path.exists(path):
+            print(f"[VISION] No board calibration at {path}, board vision off")
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        return cls(
+            [tuple(c) for c in data["corners"]],
+            data.get("roi", 0.5),
+            data.get("camera", 1),
+            tuple(data.get("resolution", (1280, 720))),
+        )
+
+    def update(self, frame, full: bool = False) -> list[tuple[int, int]]:
+        """
+        Reclassify the cells whose pixels changed since they were last
+        classified (every cell on the first call, or with full=True).
+        Returns the cells whose classification changed.
+        """
+        changed = []
+        for x, column in enumerate(self.rois):
+            for y, (rows, cols) in enumerate(column):
+                roi = frame[rows, cols]
+                grey = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+                last = self._grey[x][y]
+                if (
+                    not full
+                    and last is not None
+                    and cv2.absdiff(grey, last).mean() <= BOARD_CELL_CHANGE
+                ):
+                    continue
+                # compared against the classified pixels, so slow drift still adds up
+                self._grey[x][y] = grey
+                seen = classify_cell(roi)
+                if seen != self.cells[x][y]:
+                    self.cells[x][y] = seen
+                    changed.append((x, y))
+        return changed
+
+    def diff(self, board: list[list[Optional[Player]]]) -> list[CellDiff]:
+        """Cells where the last update() disagrees with Board.board."""
+        diffs = []
+        for x in range(BOARD_X):
+            for y in range(BOARD_Y):
+                piece = board[x][y]
+                expected = None if piece is None else piece.color
+                if self.cells[x][y] != expected:
+                    diffs.append(CellDiff((x, y), expected, self.cells[x][y]))
+        return diffs
+
+
+def classify_cell(roi) -> Optional[str]:
+    """Piece colour filling enough of a cell's region, or None for an empty cell."""
+    hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
+    coloured = (hsv[..., 1] >= PIECE_MIN_SATURATION) & (hsv[..., 2] >= PIECE_MIN_VALUE)
+    hist = np.bincount(hsv[..., 0][coloured], minlength=180)
+    color, count = max(
+        ((c, int(hist[bins].sum())) for c, bins in _HUE_BINS.items()),
+        key=lambda cc: cc[1],
+    )
+    return color if count >= PIECE_MIN_FILL * roi.shape[0] * roi.shape[1] else None
+
+
+def _pitch(centres: np.ndarray, x: int, y: int) -> float:
+    """Distance in pixels from a cell centre to its nearest neighbour's."""
+    here = centres[x, y]
+    return min(
+        float(np.hypot(*(centres[nx, ny] - here)))
+        for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+        if 0 <= nx < BOARD_X and 0 <= ny < BOARD_Y
+    )
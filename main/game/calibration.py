@@ -0,0 +1,162 @@
+"""
+Numeric board-to-machine coordinate model.
+
+Every board cell maps to a calibrated (x, y) position in millimetres. The
+calibration file can list one measured position per cell or just the column
+and row coordinates, and may add a per-axis offset and skew for a gantry that
+isn't square to the board. Distances and travel times (from a MotionModel)
+between every pair of cells are computed once, so the plotter and the plan
+optimizer only look them up. G-code is formatted when a move is sent.
+
+Calibration file (JSON), all keys but "x"/"y" or "cells" optional:
+
+    {
+        "x": [27, 68, 101, 136, 169, 200, 233, 270],
+        "y": [14, 53, 85, 120, 158],
+        "cells": [[[27, 14], [27, 53], ...], ...],
+        "offset": [0.0, 0.0],
+        "skew": [0.0, 0.0]
+    }
+
+"cells" is indexed [x][y] and overrides "x"/"y". The skew shears each axis
+by the other: x' = x + skew[0] * y, y' = y + skew[1] * x.
+"""
+
+import json
+import math
+import os
+from functools import cache
+from typing import Optional
+from game.constants import BOARD_X, BOARD_Y, CALIBRATION_FILE, X_VALUES, Y_VALUES
+from game.motion import MotionModel
+from game.state import cell_index
+
+_NUM_CELLS = BOARD_X * BOARD_Y
+
+
+class CoordinateModel:
+    def __init__(
+        self,
+        cells: list[list[tuple[float, float]]],
+        offset: tuple[float, float] = (0.0, 0.0),
+        skew: tuple[float, float] = (0.0, 0.0),
+        motion: Optional[MotionModel] = None,
+    ):
+        """
+        Parameters:
+        - cells: measured (x, y) millimetres of every cell, indexed [x][y].
+        - offset: added to every position, per axis.
+        - skew: shear of x by y and of y by x.
+        - motion: timing model for the travel-time matrix; defaults apply if None.
+        """
+        if len(cells) != BOARD_X or any(len(col) != BOARD_Y for col in cells):
+            raise ValueError(f"calibration needs {BOARD_X}x{BOARD_Y} cells")
+        self.cells = cells
+        self.offset = offset
+        self.skew = skew
+        self.motion = motion if motion is not None else MotionModel()
+
+        positions = [(0.0, 0.0)] * _NUM_CELLS
+        for bx, column in enumerate(cells):
+            for by, (x, y) in enumerate(column):
+                positions[cell_index((bx, by))] = (
+                    x + skew[0] * y + offset[0],
+                    y + skew[1] * x + offset[1],
+                )
+        self.positions: tuple[tuple[float, float], ...] = tuple(positions)
+
+        # cell index -> cell index -> per-axis distance, straight-line mm, seconds
+        self.axis_delta: list[list[tuple[float, float]]] = []
+        self.distance: list[list[float]] = []
+        self.travel_time: list[list[float]] = []
+        for ax, ay in self.positions:
+            deltas = [(abs(bx - ax), abs(by - ay)) for bx, by in self.positions]
+            self.axis_delta.append(deltas)
+            self.distance.append([math.hypot(dx, dy) for dx, dy in deltas])
+            self.travel_time.append(
+                [self.motion.move_time(dx, dy) for dx, dy in deltas]
+            )
+
+    @classmethod
+    def from_grid(
+        cls,
+        x_values: list[float],
+        y_values: list[float],
+        offset: tuple[float, float] = (0.0, 0.0),
+        skew: tuple[float, float] = (0.0, 0.0),
+    ) -> "CoordinateModel":
+        """Model for a board whose cells line up in columns and rows."""
+        cells = [[(x, y) for y in y_values] for x in x_values]
+        return cls(cells, offset, skew)
+
+    @classmethod
+    def load(cls, path: str = CALIBRATION_FILE) -> "CoordinateModel":
+        """Read a calibration file, falling back to constants.X_VALUES / Y_VALUES."""
+        if not os.path.exists(path):
+            print(f"[PLOTTER] No calibration at {path}, using default coordinates")
+            return cls.from_grid(X_VALUES, Y_VALUES)
+
+        with open(path) as f:
+            data = json.load(f)
+        offset = tuple(data.get("offset", (0.0, 0.0)))
+        skew = tuple(data.get("skew", (0.0, 0.0)))
+        if "cells" in data:
+            cells = [[tuple(cell) for cell in column] for column in data["cells"]]
+            return cls(cells, offset, skew)
+        return cls.from_grid(
+            data.get("x", X_VALUES), data.get("y", Y_VALUES), offset, skew
+        )
+
+    def with_motion(self, motion: MotionModel) -> "CoordinateModel":
+        """Same calibration, travel times recomputed for another motion model."""
+        return CoordinateModel(self.cells, self.offset, self.skew, motion)
+
+    # -------------------------
+    # Lookups
+    # -------------------------
+
+    def position(self, index: tuple[int, int]) -> tuple[float, float]:
+        """Machine (x, y) millimetres of a board cell."""
+        return self.positions[cell_index(index)]
+
+    def deltas(self, a: tuple[int, int], b: tuple[int, int]) -> tuple[float, float]:
+        """Absolute (x, y) millimetres between two cells."""
+        return self.axis_delta[cell_index(a)][cell_index(b)]
+
+    def cell_distance(self, a: tuple[int, int], b: tuple[int, int]) -> float:
+        """Straight-line millimetres between two cells."""
+        return self.distance[cell_index(a)][cell_index(b)]
+
+    def move_time(self, a: tuple[int, int], b: tuple[int, int]) -> float:
+        """Estimated seconds for one rapid from cell a to cell b."""
+        return self.travel_time[cell_index(a)][cell_index(b)]
+
+    def gcode(
+        self, target: tuple[int, int], current: Optional[tuple[int, int]] = None
+    ) -> str:
+        """
+        Rapid move to a cell, e.g. "G0 X27 Y14". Given the current cell, only
+        the axes whose machine coordinate changes are included.
+        """
+        x, y = self.position(target)
+        words = ["G0"]
+        if current is None:
+            words += ["X" + _fmt(x), "Y" + _fmt(y)]
+        else:
+            cx, cy = self.position(current)
+            if x != cx:
+                words.append("X" + _fmt(x))
+            if y != cy:
+                words.append("Y" + _fmt(y))
+        return " ".join(words)
+
+
+def _fmt(value: float) -> str:
+    """Millimetres without trailing zeros: 27.0 -> "27", 27.25 -> "27.25"."""
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+@cache
+def default_model() -> CoordinateModel:
+    """The model loaded from CALIBRATION_FILE, shared by every caller."""
+    return CoordinateModel.load()
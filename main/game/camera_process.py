@@ -0,0 +1,261 @@
+"""
+Camera capture in a child process.
+
+Decoding frames in DiceCamera's capture thread holds the GIL, which jitters
+the serial readers and plotter timing on a Raspberry Pi. ProcessDiceCamera
+runs VideoCapture in a child process instead. The child decodes each frame
+straight into one slot of a shared-memory ring buffer. Readers in the game
+process wrap the slots as NumPy views, so raw frames are never copied or
+pickled.
+
+Ring layout: an int64 header [latest sequence number, sequence number of
+each slot], a float64 capture time per slot, then the frames. Frame n goes
+to slot n % slots. The child zeroes a slot's sequence number while it
+writes the slot, so a reader that sees the same number before and after
+using a slot knows the frame wasn't overwritten underneath it. Sequence
+numbers are only written and checked while holding the ring's lock. The
+lock is what orders them against the frame bytes: without it, a weakly
+ordered CPU like the Pi's ARM core may make a frame's bytes visible before
+its slot is marked as being written.
+"""
+
+import multiprocessing as mp
+import time
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from game.camera import DiceCamera, idle_grab, open_capture
+from game.camera_profile import negotiate
+
+# seconds to wait for the child to import OpenCV and open the camera
+_OPEN_TIMEOUT = 15.0
+
+
+class _Ring:
+    """NumPy views over the shared-memory ring buffer."""
+
+    def __init__(self, buf, shape: tuple[int, ...], slots: int):
+        self.slots = slots
+        self.seqs = np.ndarray((1 + slots,), np.int64, buf, 0)
+        self.stamps = np.ndarray((slots,), np.float64, buf, 8 * (1 + slots))
+        self.frames = np.ndarray((slots, *shape), np.uint8, buf, _header_size(slots))
+
+    @staticmethod
+    def size(shape: tuple[int, ...], slots: int) -> int:
+        return _header_size(slots) + slots * int(np.prod(shape))
+
+
+def _header_size(slots: int) -> int:
+    # sequence numbers and stamps, rounded up to a cache line
+    return -(-8 * (1 + 2 * slots) // 64) * 64
+
+
+class ProcessDiceCamera(DiceCamera):
+    """DiceCamera whose frames are captured and decoded in a child process."""
+
+    def __init__(
+        self, cam_index=0, zoom=2.5, out_size=800, profile=True, slots: int = 4
+    ):
+        # no super().__init__(): the capture device belongs to the child
+        self.zoom = zoom
+        self.out_size = out_size
+        self.slots = slots
+        self._shm: SharedMemory | None = None
+        self._ring: _Ring | None = None
+
+        # spawn, not fork: the game process already runs serial threads
+        ctx = mp.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._stop = ctx.Event()
+        # set while frames are needed; DiceCamera.wake/rest work on it as is
+        self._hot = ctx.Event()
+        self._hot.set()
+        # notified by the child on every new frame, for wait_for_frame; also
+        # guards the sequence numbers (reentrant, so frame_info works inside it)
+        self._cond = ctx.Condition()
+        self._process = ctx.Process(
+            target=_capture_main,
+            args=(
+                cam_index,
+                zoom,
+                profile,
+                slots,
+                child_conn,
+                self._stop,
+                self._hot,
+                self._cond,
+            ),
+            name="dice-camera",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+
+        # the child opens the camera and reports the frame shape and capture
+        # profile, or why it failed
+        if not self._conn.poll(_OPEN_TIMEOUT):
+            self._kill()
+            raise RuntimeError(f"Camera process did not open camera {cam_index}")
+        reply = self._conn.recv()
+        if isinstance(reply, str):
+            self._process.join(timeout=1)
+            raise RuntimeError(reply)
+        self.shape: tuple[int, ...]
+        self.shape, self.profile = reply
+        if self.profile is not None:
+            self.zoom = self.profile.zoom
+            print(f"[CAMERA] {self.profile}")
+
+    def start(self):
+        """Allocate the ring buffer and let the child start publishing."""
+        self._shm = SharedMemory(create=True, size=_Ring.size(self.shape, self.slots))
+        self._ring = _Ring(self._shm.buf, self.shape, self.slots)
+        self._ring.seqs[:] = 0
+        self._conn.send(self._shm.name)
+
+    def wait_for_first_frame(self, timeout=2.0) -> bool:
+        return self.wait_for_frame(0, timeout) is not None
+
+    def has_frame(self) -> bool:
+        return self._ring is not None and self._ring.seqs[0] > 0
+
+    def frame_info(self) -> tuple[int, float]:
+        while self.has_frame():
+            seq = int(self._ring.seqs[0])
+            stamp = self._read_slot(seq, lambda frame, stamp: stamp)
+            if stamp is not None:
+                return seq, stamp
+        return 0, 0.0
+
+    def get_latest_frame(self):
+        got = self._latest_zoomed()
+        return None if got is None else got[1]
+
+    def wait_for_frame(self, after: int | float, timeout: float = 1.0):
+        if self._ring is None:
+            return None
+        if isinstance(after, int):
+            is_newer = lambda: self._ring.seqs[0] > after
+        else:
+            is_newer = lambda: self.frame_info()[1] > after
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if not self._cond.wait_for(is_newer, timeout):
+                return None
+        # zoom outside the lock so the child isn't held up
+        while time.monotonic() < deadline:
+            got = self._latest_zoomed()
+            if got is not None:
+                return got
+        return None
+
+    def _latest_zoomed(self):
+        """(sequence number, zoomed frame) of the newest frame, or None."""
+        zoom = lambda frame, stamp: self._zoom(frame)
+        while self.has_frame():
+            seq = int(self._ring.seqs[0])
+            zoomed = self._read_slot(seq, zoom)
+            if zoomed is not None:
+                return seq, zoomed
+            # overwritten while we read it; the newest frame is in another slot
+        return None
+
+    def _read_slot(self, seq: int, use):
+        """
+        use(frame view, capture time) on frame `seq` if it is still in its slot
+        afterwards; None if the child overwrote it meanwhile.
+        """
+        ring = self._ring
+        slot = seq % ring.slots
+        with self._cond:
+            if ring.seqs[1 + slot] != seq:
+                return None
+        result = use(ring.frames[slot], float(ring.stamps[slot]))
+        with self._cond:
+            if ring.seqs[1 + slot] != seq:
+                return None
+        return result
+
+    def stop(self):
+        self._stop.set()
+        self._hot.set()  # cut a resting wait short
+        if self._ring is None:
+            # never started: the child is still waiting for the ring's name
+            self._conn.send(None)
+        self._process.join(timeout=2)
+        if self._process.is_alive():
+            self._kill()
+        self._conn.close()
+        if self._shm is not None:
+            self._ring = None
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # a reader still holds a view; the mapping goes with it
+            self._shm.unlink()
+            self._shm = None
+
+    def _kill(self):
+        self._process.terminate()
+        self._process.join(timeout=1)
+
+
+def _capture_main(cam_index, zoom, profile, slots, conn, stop, hot, cond):
+    """Child process: open the camera, then decode frames into the ring buffer."""
+    try:
+        cap = open_capture(cam_index)
+        profile = negotiate(cap, cam_index, zoom) if profile else None
+        ok, frame = cap.read()
+        if not ok or frame is None:
+            raise RuntimeError(f"Camera {cam_index} opened but returned no frame")
+    except Exception as e:
+        conn.send(str(e))
+        return
+    conn.send((frame.shape, profile))
+
+    name = conn.recv()
+    if name is None:
+        cap.release()
+        return
+    shm = SharedMemory(name=name)
+    ring = _Ring(shm.buf, frame.shape, slots)
+
+    seq = 0
+    last_warn = 0
+    target = None
+    try:
+        while not stop.is_set():
+            if not hot.is_set():
+                idle_grab(cap, hot)
+                continue
+            slot = (seq + 1) % slots
+            target = ring.frames[slot]
+            with cond:
+                ring.seqs[1 + slot] = 0  # mark the slot as being written
+            ok, frame = cap.read(target)
+            stamp = time.monotonic()
+            if not ok or frame is None or frame.shape != target.shape:
+                if time.time() - last_warn > 2.0:
+                    print(
+                        "Warning: camera read failed (ok=False or frame=None)",
+                        flush=True,
+                    )
+                    last_warn = time.time()
+                time.sleep(0.1)
+                continue
+            if not np.shares_memory(frame, target):
+                # the backend allocated its own buffer instead of decoding in place
+                target[...] = frame
+
+            seq += 1
+            with cond:
+                ring.stamps[slot] = stamp
+                ring.seqs[1 + slot] = seq
+                ring.seqs[0] = seq
+                cond.notify_all()
+    finally:
+        # views into the buffer must be gone before it can be closed
+        ring = target = frame = None
+        cap.release()
+        shm.close()
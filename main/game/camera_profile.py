@@ -0,0 +1,271 @@
+"""
+Capture profile negotiation.
+
+center_square_zoom keeps only the middle of each frame (1/zoom^2 of the
+square, less of a wide frame). Decoding a full-resolution frame just to throw
+most of it away is the camera's largest steady-state CPU cost. This module
+asks the driver for as little as will do:
+
+- the pixel format (YUYV or MJPG) whose frames are cheapest to retrieve
+- the smallest resolution that still leaves CAMERA_MIN_DIE_PIXELS across
+  the zoomed die square
+- a capped frame rate
+- a sensor crop to the die region, where the V4L2 driver supports one (via
+  v4l2-ctl). The delivered frames then need no further zoom.
+- exposure and white balance locked after a warm-up, so they don't drift
+  while the die settles
+
+Every step is best effort. A setting the driver rejects is left at its
+default and reported as such.
+"""
+
+import re
+import shutil
+import subprocess
+import time
+from typing import Optional
+
+import cv2
+
+from game.constants import (
+    CAMERA_FORMATS,
+    CAMERA_FPS,
+    CAMERA_MIN_DIE_PIXELS,
+    CAMERA_RESOLUTIONS,
+    CAMERA_WARMUP,
+)
+
+# V4L2 exposure modes as OpenCV's V4L2 backend passes them through
+_V4L2_EXPOSURE_MANUAL = 1
+# frames timed when measuring decode cost
+_DECODE_SAMPLES = 5
+
+_RECT = re.compile(r"Left (\d+), Top (\d+), Width (\d+), Height (\d+)")
+
+
+class CaptureProfile:
+    """What the driver agreed to, and what a frame costs to decode."""
+
+    __slots__ = (
+        "fourcc",
+        "width",
+        "height",
+        "fps",
+        "crop",
+        "zoom",
+        "exposure_locked",
+        "wb_locked",
+        "decode_ms",
+    )
+
+    def __init__(self, fourcc: str, width: int, height: int, fps: float, zoom: float):
+        self.fourcc = fourcc
+        self.width = width
+        self.height = height
+        self.fps = fps  # as reported by the driver; 0 if unknown
+        # sensor crop (left, top, width, height), or None if frames show the full view
+        self.crop: Optional[tuple[int, int, int, int]] = None
+        self.zoom = zoom  # software zoom still to apply to each frame
+        self.exposure_locked = False
+        self.wb_locked = False
+        self.decode_ms = 0.0  # mean retrieve() time: decode and colour conversion
+
+    @property
+    def kept(self) -> float:
+        """Share of each decoded frame left after the software zoom."""
+        side = min(self.width, self.height) / self.zoom
+        return side * side / (self.width * self.height)
+
+    def __repr__(self) -> str:
+        crop = (
+            "none"
+            if self.crop is None
+            else "{}x{}+{}+{}".format(*self.crop[2:], *self.crop[:2])
+        )
+        return (
+            f"<CaptureProfile {self.fourcc} {self.width}x{self.height} "
+            f"@{self.fps:g}fps crop={crop} zoom={self.zoom:g} "
+            f"keeps {self.kept:.0%} exposure={_locked(self.exposure_locked)} "
+            f"wb={_locked(self.wb_locked)} decode={self.decode_ms:.2f}ms>"
+        )
+
+
+def negotiate(cap: cv2.VideoCapture, cam_index=0, zoom: float = 2.5) -> CaptureProfile:
+    """
+    Configure an open capture for reading the die and report the result.
+    Takes about CAMERA_WARMUP seconds, most of it letting auto exposure settle.
+    """
+    cap.set(cv2.CAP_PROP_FPS, CAMERA_FPS)
+
+    # try each format at its smallest adequate size; keep the cheapest to decode
+    best: Optional[tuple[float, str, tuple[int, int]]] = None
+    for fourcc in CAMERA_FORMATS:
+        if not _set_fourcc(cap, fourcc):
+            continue
+        size = _set_smallest_size(cap, zoom)
+        cost = _decode_cost(cap)
+        print(f"[CAMERA] {fourcc} {size[0]}x{size[1]}: decode {cost:.2f}ms")
+        if best is None or cost < best[0]:
+            best = (cost, fourcc, size)
+    if best is not None and _get_fourcc(cap) != best[1]:
+        _set_fourcc(cap, best[1])
+        _set_size(cap, best[2])
+
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    profile = CaptureProfile(
+        _get_fourcc(cap), width, height, cap.get(cv2.CAP_PROP_FPS), zoom
+    )
+
+    profile.crop = _sensor_crop(cam_index, zoom, width / height)
+    if profile.crop is not None:
+        # the driver now scales just the die region into each frame
+        profile.zoom = 1.0
+
+    _warm_up(cap, CAMERA_WARMUP)
+    profile.exposure_locked = _lock_exposure(cap)
+    profile.wb_locked = _lock_white_balance(cap)
+    profile.decode_ms = _decode_cost(cap)
+    return profile
+
+
+# -------------------------
+# Format and size
+# -------------------------
+
+
+def _get_fourcc(cap: cv2.VideoCapture) -> str:
+    code = int(cap.get(cv2.CAP_PROP_FOURCC))
+    return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+
+
+def _set_fourcc(cap: cv2.VideoCapture, fourcc: str) -> bool:
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    return _get_fourcc(cap) == fourcc
+
+
+def _set_size(cap: cv2.VideoCapture, size: tuple[int, int]) -> tuple[int, int]:
+    """Request a resolution; returns what the driver snapped it to."""
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+    return int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(
+        cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+    )
+
+
+def _set_smallest_size(cap: cv2.VideoCapture, zoom: float) -> tuple[int, int]:
+    """Smallest candidate resolution that still covers the die; else the largest."""
+    got = (0, 0)
+    for size in sorted(CAMERA_RESOLUTIONS, key=lambda s: s[0] * s[1]):
+        got = _set_size(cap, size)
+        if min(got) / zoom >= CAMERA_MIN_DIE_PIXELS:
+            break
+    return got
+
+
+def _decode_cost(cap: cv2.VideoCapture) -> float:
+    """Mean milliseconds retrieve() spends turning a grabbed frame into BGR."""
+    total = 0.0
+    n = 0
+    for _ in range(_DECODE_SAMPLES):
+        if not cap.grab():  # waits for the sensor; not part of the cost
+            continue
+        t0 = time.perf_counter()
+        ok, _ = cap.retrieve()
+        if ok:
+            total += time.perf_counter() - t0
+            n += 1
+    return total * 1000 / n if n else 0.0
+
+
+# -------------------------
+# Exposure and white balance
+# -------------------------
+
+
+def _warm_up(cap: cv2.VideoCapture, seconds: float) -> None:
+    """Grab frames without decoding while the auto controls settle."""
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        if not cap.grab():
+            break
+
+
+def _lock_exposure(cap: cv2.VideoCapture) -> bool:
+    """Switch to manual exposure at the value auto exposure settled on."""
+    exposure = cap.get(cv2.CAP_PROP_EXPOSURE)
+    if not cap.set(cv2.CAP_PROP_AUTO_EXPOSURE, _V4L2_EXPOSURE_MANUAL):
+        return False
+    return cap.set(cv2.CAP_PROP_EXPOSURE, exposure)
+
+
+def _lock_white_balance(cap: cv2.VideoCapture) -> bool:
+    """Switch off auto white balance at the temperature it settled on."""
+    temperature = cap.get(cv2.CAP_PROP_WB_TEMPERATURE)
+    if not cap.set(cv2.CAP_PROP_AUTO_WB, 0):
+        return False
+    return temperature <= 0 or cap.set(cv2.CAP_PROP_WB_TEMPERATURE, temperature)
+
+
+def _locked(locked: bool) -> str:
+    return "locked" if locked else "auto"
+
+
+# -------------------------
+# Sensor crop
+# -------------------------
+
+
+def _sensor_crop(
+    cam_index, zoom: float, aspect: float
+) -> Optional[tuple[int, int, int, int]]:
+    """
+    Crop the sensor to the zoomed die region with v4l2-ctl. The crop keeps
+    the frame's aspect ratio, so the centre square of each delivered frame
+    is the die square. Returns the crop set, or None if the device, driver
+    or tool doesn't allow one.
+    """
+    if not isinstance(cam_index, int) or shutil.which("v4l2-ctl") is None:
+        return None
+    device = f"/dev/video{cam_index}"
+    bounds = _v4l2_rect(device, "--get-cropcap")
+    if bounds is None:
+        return None
+    left, top, width, height = bounds
+
+    side = min(width, height) / zoom
+    crop_h = int(side) & ~1
+    crop_w = min(width, int(side * aspect)) & ~1
+    # even offsets and sizes, as YUYV and most ISPs need
+    crop = (
+        (left + (width - crop_w) // 2) & ~1,
+        (top + (height - crop_h) // 2) & ~1,
+        crop_w,
+        crop_h,
+    )
+    spec = "left={},top={},width={},height={}".format(*crop)
+    if _v4l2_ctl(device, f"--set-crop={spec}") is None:
+        return None
+    # drivers may round the crop or ignore it while streaming
+    applied = _v4l2_rect(device, "--get-crop")
+    return crop if applied == crop else None
+
+
+def _v4l2_rect(device: str, option: str) -> Optional[tuple[int, int, int, int]]:
+    out = _v4l2_ctl(device, option)
+    match = _RECT.search(out or "")
+    return None if match is None else tuple(int(v) for v in match.groups())
+
+
+def _v4l2_ctl(device: str, option: str) -> Optional[str]:
+    """v4l2-ctl's output, or None if it failed."""
+    try:
+        result = subprocess.run(
+            ["v4l2-ctl", "-d", device, option],
+            capture_output=True,
+            text=True,
+            timeout=2,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout if result.returncode == 0 else None
@@ -1,21 +1,69 @@
+import os
 from enum import Enum
 
 ROLL_AGAIN = 6
 
-# generate coordinate mapping
+# default board coordinates (mm), used when there is no calibration file
 X_VALUES = [27, 68, 101, 136, 169, 200, 233, 270]
 Y_VALUES = [14, 53, 85, 120, 158]
-GRBL_COORDINATES: list[list[tuple[str, str]]] = []
-for i, x in enumerate(X_VALUES):
-    GRBL_COORDINATES.append([])
-    for y in Y_VALUES:
-        GRBL_COORDINATES[i].append(("X" + str(x), "Y" + str(y)))
+
+# files kept next to main.py
+MAIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CALIBRATION_FILE = os.path.join(MAIN_DIR, "calibration.json")
+# last known plotter position, for warm starts
+PLOTTER_STATE_FILE = os.path.join(MAIN_DIR, "plotter_state.json")
+# how far (mm) GRBL's reported position may be from the saved one on a warm start
+WARM_START_TOLERANCE = 0.5
 
 PLAYER_TO_HOME = {"BLUE": (0, 0), "RED": (0, 4), "GREEN": (7, 4), "YELLOW": (7, 0)}
 
-# plotter sleeps
-BASE_SLEEP = 1
-UNIT_SLEEP = 0.015
+# plotter motion model defaults, used until GRBL reports $110/$111 and $120/$121
+DEFAULT_MAX_RATE = (4000.0, 4000.0)  # mm/min
+DEFAULT_ACCEL = (100.0, 100.0)  # mm/s^2
+MOVE_OVERHEAD = 0.05  # seconds per move for the serial round trip
+MAGNET_SETTLE = 0.2  # seconds for the magnet to grab or drop a piece
+
+# plotter motion sync: status poll period and longest motion allowed (seconds)
+STATUS_POLL_INTERVAL = 0.05
+MOTION_TIMEOUT = 30
+
+# dice reading: the die counts as settled once consecutive 64x64 grey thumbnails
+# differ by less than DICE_SETTLE_DIFF (mean absolute, 0-255) for
+# DICE_SETTLE_FRAMES frames; then up to DICE_MAX_VOTES settled frames are counted,
+# stopping early once DICE_AGREE of them agree
+DICE_SETTLE_DIFF = 4.0
+DICE_SETTLE_FRAMES = 2
+DICE_MAX_VOTES = 5
+DICE_AGREE = 3
+DICE_READ_TIMEOUT = 3.0  # seconds
+DICE_MIN_CONFIDENCE = 0.6  # share of votes the winning count needs
+DICE_READ_ATTEMPTS = 3
+
+# camera capture profile: pixel formats to try, candidate resolutions (the
+# smallest one whose zoomed die square is at least CAMERA_MIN_DIE_PIXELS
+# sensor pixels across wins), frame rate cap, and seconds of auto exposure and
+# white balance before both are locked
+CAMERA_FORMATS = ("YUYV", "MJPG")
+CAMERA_RESOLUTIONS = [(640, 480), (800, 600), (1280, 720), (1280, 960), (1920, 1080)]
+CAMERA_MIN_DIE_PIXELS = 240
+CAMERA_FPS = 15
+CAMERA_WARMUP = 1.0
+# between rolls the camera rests: it only grabs (no decode) every this many seconds
+CAMERA_IDLE_INTERVAL = 0.5
+# most frames drained on waking, in case a driver keeps grabbing instantly
+CAMERA_MAX_STALE = 8
+
+# board vision: calibration file (no file, no vision), piece colours as OpenCV
+# hues (0-179) +/- PIECE_HUE_TOLERANCE, the saturation and value a pixel needs
+# to count as piece-coloured, the share of a cell's region a piece must fill,
+# and the mean grey change (0-255) that makes a cell get reclassified
+BOARD_VISION_FILE = os.path.join(MAIN_DIR, "board_vision.json")
+PIECE_HUES = {"BLUE": 110, "RED": 0, "GREEN": 60, "YELLOW": 28}
+PIECE_HUE_TOLERANCE = 12
+PIECE_MIN_SATURATION = 90
+PIECE_MIN_VALUE = 60
+PIECE_MIN_FILL = 0.3
+BOARD_CELL_CHANGE = 6.0
 
 
 class PlayerColor(Enum):
@@ -0,0 +1,138 @@
+"""
+Reading the die from the camera.
+
+A single frame can catch the die mid-tumble or blurred. DiceReader waits for
+the die to settle, using cheap differencing of small grey thumbnails of
+consecutive frames. It then counts pips on several settled frames and takes
+a majority vote, stopping as soon as enough frames agree.
+"""
+
+import time
+from collections import Counter
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from game.camera import DiceCamera, count_pips_fast
+from game.constants import (
+    DICE_AGREE,
+    DICE_MAX_VOTES,
+    DICE_MIN_CONFIDENCE,
+    DICE_READ_TIMEOUT,
+    DICE_SETTLE_DIFF,
+    DICE_SETTLE_FRAMES,
+)
+
+_THUMB_SIZE = (64, 64)
+
+
+class DiceReading:
+    """Outcome of one read: the voted value and how sure the vote was."""
+
+    __slots__ = ("value", "confidence", "votes", "frames", "elapsed")
+
+    def __init__(
+        self,
+        value: Optional[int],
+        confidence: float,
+        votes: dict[int, int],
+        frames: int,
+        elapsed: float,
+    ):
+        self.value = value  # 1-6, or None if no settled frame gave a valid count
+        self.confidence = confidence  # share of counted frames that voted for value
+        self.votes = votes  # pip count -> frames, invalid counts included
+        self.frames = frames  # frames looked at, settling included
+        self.elapsed = elapsed  # seconds from the start of the read
+
+    @property
+    def ok(self) -> bool:
+        return self.value is not None and self.confidence >= DICE_MIN_CONFIDENCE
+
+    def __repr__(self) -> str:
+        return (
+            f"<DiceReading {self.value} confidence={self.confidence:.2f} "
+            f"votes={self.votes} frames={self.frames} in {self.elapsed:.2f}s>"
+        )
+
+
+class DiceReader:
+    def __init__(
+        self,
+        cam: DiceCamera,
+        settle_diff: float = DICE_SETTLE_DIFF,
+        settle_frames: int = DICE_SETTLE_FRAMES,
+        max_votes: int = DICE_MAX_VOTES,
+        agree: int = DICE_AGREE,
+    ):
+        self.cam = cam
+        self.settle_diff = settle_diff
+        self.settle_frames = settle_frames
+        self.max_votes = max_votes
+        self.agree = agree
+
+    def read(self, after: float, timeout: float = DICE_READ_TIMEOUT) -> DiceReading:
+        """
+        Read the die from frames captured after `after` (a time.monotonic()
+        timestamp, e.g. when the panel reported the roll).
+        """
+        t0 = time.monotonic()
+        deadline = t0 + timeout
+        cursor: int | float = after
+        previous = None
+        still = 0
+        frames = 0
+        votes: Counter[int] = Counter()
+        while sum(votes.values()) < self.max_votes:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            got = self.cam.wait_for_frame(cursor, remaining)
+            if got is None:
+                break
+            cursor, frame = got
+            frames += 1
+
+            thumb = _thumbnail(frame)
+            moving = previous is None or _difference(previous, thumb) > self.settle_diff
+            previous = thumb
+            if moving:
+                # the die moved again; earlier votes may be from a resting moment
+                still = 0
+                votes.clear()
+                continue
+            still += 1
+            if still < self.settle_frames:
+                continue
+
+            count, _, _ = count_pips_fast(frame)
+            votes[count] += 1
+            value, top = _leader(votes)
+            if value is not None and top >= self.agree:
+                break
+
+        value, top = _leader(votes)
+        counted = sum(votes.values())
+        confidence = top / counted if counted else 0.0
+        return DiceReading(
+            value, confidence, dict(votes), frames, time.monotonic() - t0
+        )
+
+
+def _thumbnail(frame) -> np.ndarray:
+    small = cv2.resize(frame, _THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+
+def _difference(a: np.ndarray, b: np.ndarray) -> float:
+    return float(cv2.absdiff(a, b).mean())
+
+
+def _leader(votes: Counter) -> tuple[Optional[int], int]:
+    """Most voted valid die face (1-6) and its vote count."""
+    valid = [(n, v) for v, n in votes.items() if 1 <= v <= 6]
+    if not valid:
+        return None, 0
+    n, v = max(valid)
+    return v, n
@@ -1,38 +1,57 @@
 import time
 import cv2
+from concurrent.futures import ThreadPoolExecutor
 
 from game.serial_protocol import ControlPanelProtocol
 from game.player_manager import PlayerManager
 from game.board import Board
 from game.player import Player
-from game.constants import ROLL_AGAIN, ENCODE_PLAYER_COLOR
+from game.constants import ROLL_AGAIN, ENCODE_PLAYER_COLOR, DICE_READ_ATTEMPTS
 from game.camera import DiceCamera
+from game.camera_process import ProcessDiceCamera
+from game.dice import DiceReader
+from game.board_vision import BoardVision, CellDiff
+from game.startup import check_devices, start_devices
 
 
 class Game:
     """Main game loop orchestrator."""
 
-    def __init__(self):
+    def __init__(self, speculative: bool = True, camera_process: bool = False):
+        """
+        speculative: while the dice roll, plan every outcome and move the head
+        to where the current player's move will start.
+        camera_process: opt in to capturing and decoding camera frames in a
+        child process (ProcessDiceCamera) instead of a thread of this one.
+        """
         # self.cp = ControlPanelProtocol()
         self.cp = ControlPanelProtocol(simulation=False, port="/dev/ttyACM0")
-        self.board = Board()
+        # Board (and its plotter) and the camera are created in run(), in parallel
+        self.board: Board | None = None
         self.players_manager = PlayerManager()
         self.game_over: bool = False
         self.roll_value: int = 0
 
         # Camera handle lives on the instance so roll() can access it
         self.cam: DiceCamera | None = None
+        self.dice: DiceReader | None = None
+        # board camera and occupancy check, only with a board vision calibration
+        self.vision: BoardVision | None = BoardVision.load()
+        self.board_cam: DiceCamera | None = None
+        self.speculative = speculative
+        self.camera_process = camera_process
 
     def run(self) -> None:
         """Run the tabletop game."""
         self._establish_connections()
+        self._setup_players()
+        try:
+            self._play()
+        finally:
+            cv2.destroyAllWindows()
+            self._release_devices()
 
-        # Start camera once, keep it running for the whole game
-        self.cam = DiceCamera()
-        self.cam.start()
-        if not self.cam.wait_for_first_frame():
-            raise RuntimeError("Camera never produced a frame")
-
+    def _setup_players(self) -> None:
         config: dict[str, str | None] = self.cp.wait_for_config()
         self.players_manager.create_players(config)
         self.board.populate(self.players_manager.players)
@@ -41,63 +60,187 @@ class Game:
         self.determine_order()
         print("GAME: order determined.")
 
-        try:
-            while not self.game_over and self.players_manager.players:
-                frame = self.cam.get_latest_frame()
-                if frame is None:
-                    time.sleep(0.01)
-                    continue
-
-                print(self.board.board)
-                player: Player = self.players_manager.players[
-                    self.players_manager.current_index
-                ]
-                self.roll_value = ROLL_AGAIN
-
-                moved = False
-                while self.roll_value == ROLL_AGAIN:
-                    print("GAME: rolling...")
-                    self.roll_value = self.roll(player)
-                    print("GAME: moving...")
-                    moved = self.board.move(player, self.roll_value)
-                    # self.board.update()  # would implement CV here
-                if moved and player.isHome():
-                    self.cp.send_victory(player)
-                    self.players_manager.players.remove(player)
-                    self.game_over = self.board.check_game_over(
-                        self.players_manager.players
-                    )
-
-                self.players_manager.next_player()
+    def _play(self) -> None:
+        """Take turns until the game is over."""
+        while not self.game_over and self.players_manager.players:
+            if not self.cam.has_frame():
+                time.sleep(0.01)
+                continue
 
-        finally:
-            if self.cam is not None:
-                self.cam.stop()
-                self.cam = None
-            cv2.destroyAllWindows()
+            print(self.board.board)
+            player: Player = self.players_manager.players[
+                self.players_manager.current_index
+            ]
+            self.roll_value = ROLL_AGAIN
+
+            moved = False
+            while self.roll_value == ROLL_AGAIN:
+                print("GAME: rolling...")
+                self.roll_value = self.roll(player, speculate=self.speculative)
+                print("GAME: moving...")
+                moved = self.board.move(player, self.roll_value)
+                self.verify_board()
+            self.board.plotter.save_state()
+            if moved and player.isHome():
+                self.cp.send_victory(ENCODE_PLAYER_COLOR[player.color])
+                self.players_manager.players.remove(player)
+                self.game_over = self.board.check_game_over(
+                    self.players_manager.players
+                )
+
+            self.players_manager.next_player()
+
+    def _release_devices(self) -> None:
+        if self.cam is not None:
+            self.cam.stop()
+            self.cam = None
+        if self.board_cam is not None:
+            self.board_cam.stop()
+            self.board_cam = None
+        if self.board is not None:
             self.board.plotter.close()
 
-    def roll(self, player: Player) -> int:
-        """Request roll from control panel, read value from camera, return value."""
+    def roll(self, player: Player, speculate: bool = False) -> int:
+        """
+        Request roll from control panel, read value from camera, return value.
+        With speculate, the player's move is prepared while the dice roll.
+        """
         if self.cam is None:
             raise RuntimeError("Camera not initialized. Did you call run()?")
-        self.cp.send_roll_request(ENCODE_PLAYER_COLOR[player.color])
-        if self.cp.wait_for_dice_complete():
-            count, mask, debug = self.cam.get_pips()
-            # If something went wrong and we couldn't read a frame yet
-            if count is None:
-                raise RuntimeError("No camera frame available to read pips.")
-            print("Pips:", count)
-            if count < 1:
-                count = 1
-            elif count > 6:
-                count = 6
-            return count
-
-        raise Exception("roll failed")
+        spec = None
+        # leaving the pool waits for the speculation, after the die is read
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            # frames are only needed from the roll request until the die is read
+            self.cam.wake()
+            try:
+                self.cp.send_roll_request(ENCODE_PLAYER_COLOR[player.color])
+                if speculate:
+                    spec = pool.submit(self._speculate, player)
+                complete = self.cp.wait_for_dice_complete()
+                # only frames captured after the panel reported the roll show the result
+                rolled_at = time.monotonic()
+                if not complete:
+                    raise Exception("roll failed")
+                value = self._read_die(rolled_at)
+            finally:
+                self.cam.rest()
+        if spec is not None:
+            # re-raises only a failed resync: the head is then somewhere unknown
+            spec.result()
+        return value
+
+    def _read_die(self, after: float) -> int:
+        """Read the settled die, looking again at new frames if the vote is unsure."""
+        for _ in range(DICE_READ_ATTEMPTS):
+            reading = self.dice.read(after)
+            print("Dice:", reading)
+            if reading.ok:
+                return reading.value
+            after = time.monotonic()
+        raise RuntimeError("Could not read the die")
+
+    def _speculate(self, player: Player) -> None:
+        """
+        Plan all six outcomes and pre-position the head; runs during the roll.
+        A failure only costs the head start, so it is logged and the head put
+        back on a known cell for the move.
+        """
+        try:
+            target = self.board.speculate(player)
+            if target is not None:
+                self.board.plotter.go_to(target)
+        except Exception as e:
+            print(f"GAME: speculation failed ({e!r}), resyncing the plotter")
+            self.board.plotter.resync()
 
     def _establish_connections(self) -> None:
-        self.cp.connect()
+        """Bring up control panel, plotter and camera concurrently."""
+        starters = {
+            "control panel": self._connect_panel,
+            "plotter": Board,
+            "camera": self._start_camera,
+        }
+        if self.vision is not None:
+            starters["board camera"] = self._start_board_camera
+        devices = start_devices(starters)
+        self.board = devices["plotter"].value
+        # Start camera once, keep it running for the whole game
+        self.cam = devices["camera"].value
+        if self.cam is not None:
+            self.dice = DiceReader(self.cam)
+        if "board camera" in devices:
+            self.board_cam = devices["board camera"].value
+        try:
+            check_devices(devices)
+        except RuntimeError:
+            self._release_devices()
+            self.cp.disconnect()
+            raise
+
+    def _connect_panel(self) -> None:
+        if not self.cp.connect():
+            raise RuntimeError(f"Could not open control panel on {self.cp.port}")
+
+    def _start_camera(self) -> DiceCamera:
+        cam = ProcessDiceCamera() if self.camera_process else DiceCamera()
+        cam.start()
+        if not cam.wait_for_first_frame():
+            cam.stop()
+            raise RuntimeError("Camera never produced a frame")
+        cam.rest()  # until the first roll
+        return cam
+
+    def _start_board_camera(self) -> DiceCamera:
+        # whole frames at the calibrated resolution: the die profile would pick
+        # the smallest size and square it up, cutting off the board's ends
+        cam = DiceCamera(
+            self.vision.camera,
+            out_size=None,
+            profile=False,
+            resolution=self.vision.resolution,
+        )
+        cam.start()
+        if not cam.wait_for_first_frame():
+            cam.stop()
+            raise RuntimeError("Board camera never produced a frame")
+        frame = cam.get_latest_frame()
+        height, width = frame.shape[:2]
+        if (width, height) != self.vision.resolution:
+            cam.stop()
+            raise RuntimeError(
+                f"Board camera gives {width}x{height} frames, calibrated at "
+                f"{self.vision.resolution[0]}x{self.vision.resolution[1]}"
+            )
+        self.vision.update(frame, full=True)
+        cam.rest()
+        return cam
+
+    def verify_board(self) -> list[CellDiff]:
+        """
+        Compare the board camera's view with the board model, once the
+        plotter has finished moving. Returns the cells that disagree; empty
+        without board vision.
+        """
+        if self.vision is None or self.board_cam is None:
+            return []
+        self.board_cam.wake()
+        try:
+            frame = self.board_cam.wait_for_frame_after(time.monotonic())
+        finally:
+            self.board_cam.rest()
+        if frame is None:
+            print("[VISION] No frame from the board camera")
+            return []
+        t0 = time.perf_counter()
+        changed = self.vision.update(frame)
+        diffs = self.vision.diff(self.board.board)
+        print(
+            f"[VISION] {len(changed)} cells changed, checked in "
+            f"{(time.perf_counter() - t0) * 1000:.1f}ms"
+        )
+        for d in diffs:
+            print(f"[VISION] mismatch: {d}")
+        return diffs
 
     def determine_order(self) -> None:
         """Determine first player by roll and update players list."""
@@ -0,0 +1,81 @@
+"""GRBL protocol helpers shared by the plotter and the streaming sender."""
+
+from typing import Optional
+
+
+class PlotterError(RuntimeError):
+    """GRBL reported an alarm or error, or a motion never finished."""
+
+
+class GrblStatus:
+    """One parsed real-time status report, e.g. <Idle|MPos:0.000,0.000,0.000|FS:0,0>."""
+
+    def __init__(self, state: str, fields: dict[str, tuple[float, ...]]):
+        self.state = state  # Idle, Run, Hold:0, Jog, Alarm, Door:0, Check, Home, Sleep
+        self.fields = fields
+
+    @property
+    def idle(self) -> bool:
+        return self.state == "Idle"
+
+    @property
+    def alarm(self) -> bool:
+        return self.state.startswith("Alarm")
+
+    @property
+    def mpos(self) -> Optional[tuple[float, ...]]:
+        return self.fields.get("MPos")
+
+    @property
+    def wpos(self) -> Optional[tuple[float, ...]]:
+        return self.fields.get("WPos")
+
+    @property
+    def wco(self) -> Optional[tuple[float, ...]]:
+        """Work coordinate offset; GRBL 1.1 only includes it in some reports."""
+        return self.fields.get("WCO")
+
+    def __repr__(self) -> str:
+        return f"<GrblStatus {self.state} {self.fields}>"
+
+
+def parse_setting(line: str) -> Optional[tuple[int, float]]:
+    """Parse one `$$` line such as "$110=3000.000" or "$110=3000.000 (x max rate)"."""
+    line = line.strip()
+    if not line.startswith("$"):
+        return None
+    key, _, value = line[1:].partition("=")
+    try:
+        return int(key), float(value.split()[0])
+    except (ValueError, IndexError):
+        return None
+
+
+def parse_status(line: str) -> Optional[GrblStatus]:
+    """Parse a GRBL 1.1 (|-separated) or 0.9 (comma-separated) status report."""
+    line = line.strip()
+    if not (line.startswith("<") and line.endswith(">")):
+        return None
+    body = line[1:-1]
+    fields: dict[str, tuple[float, ...]] = {}
+    if "|" in body:
+        state, *parts = body.split("|")
+        for part in parts:
+            key, _, values = part.partition(":")
+            try:
+                fields[key] = tuple(float(v) for v in values.split(","))
+            except ValueError:
+                continue
+    else:
+        state, *tokens = body.split(",")
+        key = None
+        for token in tokens:
+            if ":" in token:
+                key, _, token = token.partition(":")
+                fields[key] = ()
+            if key is not None:
+                try:
+                    fields[key] += (float(token),)
+                except ValueError:
+                    pass
+    return GrblStatus(state, fields)
@@ -0,0 +1,195 @@
+"""
+Streaming G-code sender using GRBL's character-counting flow control.
+
+GRBL has a 128-byte serial RX buffer. Rather than waiting for each line's
+`ok` before sending the next, the streamer keeps track of how many bytes are
+still unacknowledged and sends the next line as soon as it fits, so the
+planner always has moves queued. A reader thread matches every `ok` / `error`
+to the oldest line in flight and collects status reports. Callers get one
+Future per batch of lines.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Optional
+from game.grbl import GrblStatus, PlotterError, parse_status
+
+RX_BUFFER_SIZE = 128
+
+
+class _Batch:
+    def __init__(self, lines: list[str]):
+        self.future: Future = Future()
+        self.remaining = len(lines)
+        self.error: Optional[str] = None
+
+
+class GrblStreamer:
+    def __init__(self, ser, rx_buffer_size: int = RX_BUFFER_SIZE):
+        """
+        Parameters:
+        - ser: open GRBL serial connection; the streamer becomes its only reader.
+        - rx_buffer_size: GRBL's serial receive buffer size in bytes.
+        """
+        self.ser = ser
+        self.rx_buffer_size = rx_buffer_size
+        self._cond = threading.Condition()
+        # the writer thread and real-time commands share the port; one write at a time
+        self._write_lock = threading.Lock()
+        self._pending: deque[tuple[bytes, _Batch]] = deque()  # not yet written
+        self._in_flight: deque[tuple[int, _Batch]] = deque()  # written, not acked
+        self._buffered = 0  # bytes in flight
+        self._status: Optional[GrblStatus] = None
+        self._status_seq = 0
+        self._errors: list[str] = []
+        self._running = True
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._reader.start()
+        self._writer.start()
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def send(self, lines: list[str]) -> Future:
+        """
+        Queue lines of G-code and return a Future that resolves once GRBL has
+        acknowledged all of them, or fails with PlotterError if any was rejected.
+        """
+        batch = _Batch(lines)
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("send called on a closed GRBL streamer")
+            if not lines:
+                batch.future.set_result(None)
+                return batch.future
+            for line in lines:
+                line = line.strip()
+                print(f">> {line}")
+                self._pending.append(((line + "\n").encode("ascii"), batch))
+            self._cond.notify_all()
+        return batch.future
+
+    def realtime(self, command: bytes) -> None:
+        """Send a real-time command ('?', '!', '~'); these bypass the RX buffer."""
+        with self._write_lock:
+            self.ser.write(command)
+
+    def query_status(self, timeout: float = 1.0) -> GrblStatus:
+        """Send '?' and wait for the next status report."""
+        with self._cond:
+            seq = self._status_seq
+            self.realtime(b"?")
+            if not self._cond.wait_for(lambda: self._status_seq != seq, timeout):
+                raise PlotterError("GRBL did not answer a status query")
+            return self._status
+
+    def check(self) -> None:
+        """Raise PlotterError for the first line GRBL rejected since the last check."""
+        with self._cond:
+            errors, self._errors = self._errors, []
+        if errors:
+            raise PlotterError(f"GRBL rejected streamed commands: {errors}")
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every queued line has been acknowledged."""
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: not self._pending and not self._in_flight, timeout
+            ):
+                raise PlotterError("GRBL did not acknowledge queued commands")
+
+    def close(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._writer.join(timeout=1)
+        self._reader.join(timeout=1)
+        self._fail_all("streamer closed")
+
+    # -------------------------
+    # Threads
+    # -------------------------
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: not self._running
+                    or (
+                        self._pending
+                        and self._buffered + len(self._pending[0][0])
+                        <= self.rx_buffer_size
+                    )
+                )
+                if not self._running:
+                    return
+                data, batch = self._pending.popleft()
+                self._in_flight.append((len(data), batch))
+                self._buffered += len(data)
+            with self._write_lock:
+                self.ser.write(data)
+
+    def _read_loop(self) -> None:
+        while self._running:
+            try:
+                raw = self.ser.readline()
+            except Exception as e:
+                self._fail_all(f"serial read failed: {e}")
+                return
+            response = raw.decode("ascii", errors="ignore").strip()
+            if not response:
+                continue
+            if response == "ok" or response.startswith("error"):
+                self._ack(response)
+            elif response.startswith("<"):
+                status = parse_status(response)
+                if status is not None:
+                    with self._cond:
+                        self._status = status
+                        self._status_seq += 1
+                        self._cond.notify_all()
+            elif response.startswith("ALARM"):
+                print("GRBL:", response)
+                self._fail_all(response)
+            else:
+                print("GRBL:", response)
+
+    def _ack(self, response: str) -> None:
+        with self._cond:
+            if not self._in_flight:
+                return
+            size, batch = self._in_flight.popleft()
+            self._buffered -= size
+            if response != "ok":
+                print("GRBL:", response)
+                batch.error = batch.error or response
+                self._errors.append(response)
+            batch.remaining -= 1
+            self._cond.notify_all()
+        if batch.remaining == 0:
+            _resolve(batch)
+
+    def _fail_all(self, reason: str) -> None:
+        with self._cond:
+            batches = {id(b): b for _, b in self._pending}
+            batches.update({id(b): b for _, b in self._in_flight})
+            self._pending.clear()
+            self._in_flight.clear()
+            self._buffered = 0
+            self._errors.append(reason)
+            self._cond.notify_all()
+        for batch in batches.values():
+            batch.error = batch.error or reason
+            _resolve(batch)
+
+
+def _resolve(batch: _Batch) -> None:
+    if batch.future.done():
+        return
+    if batch.error:
+        batch.future.set_exception(PlotterError(f"GRBL reported {batch.error}"))
+    else:
+        batch.future.set_result(None)
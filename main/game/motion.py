@@ -0,0 +1,89 @@
+"""
+Acceleration-aware motion timing for the plotter.
+
+GRBL ramps every move up to the rate limit and back down with a fixed
+acceleration. Short moves never reach full speed, and long ones cruise for
+most of their length. A straight-line rapid is limited by whichever axis
+reaches its own max rate ($110/$111) or acceleration ($120/$121) first.
+The model predicts how long a move or a whole plan takes from those
+settings.
+"""
+
+import math
+from game.constants import DEFAULT_ACCEL, DEFAULT_MAX_RATE, MAGNET_SETTLE, MOVE_OVERHEAD
+from game.plan import Plan, CARRY, MAGNET_OFF, MAGNET_ON, TRAVEL
+
+# GRBL setting numbers: max rate (mm/min) and acceleration (mm/s^2) per axis
+MAX_RATE_SETTINGS = (110, 111)
+ACCEL_SETTINGS = (120, 121)
+
+
+class MotionModel:
+    def __init__(
+        self,
+        max_rate: tuple[float, float] = DEFAULT_MAX_RATE,
+        accel: tuple[float, float] = DEFAULT_ACCEL,
+        overhead: float = MOVE_OVERHEAD,
+    ):
+        """
+        Parameters:
+        - max_rate: X and Y max rate in mm/min, as GRBL reports them.
+        - accel: X and Y acceleration in mm/s^2.
+        - overhead: fixed seconds per move for the command round trip.
+        """
+        self.max_rate = max_rate
+        self.accel = accel
+        self.overhead = overhead
+        self._speed = (max_rate[0] / 60, max_rate[1] / 60)  # mm/s
+
+    @classmethod
+    def from_settings(cls, settings: dict[int, float]) -> "MotionModel":
+        """Build a model from parsed `$$` output; missing settings use the defaults."""
+        max_rate = tuple(
+            settings.get(n, d) for n, d in zip(MAX_RATE_SETTINGS, DEFAULT_MAX_RATE)
+        )
+        accel = tuple(settings.get(n, d) for n, d in zip(ACCEL_SETTINGS, DEFAULT_ACCEL))
+        return cls(max_rate, accel)
+
+    def move_time(self, dx: float, dy: float) -> float:
+        """Predicted seconds for one straight rapid covering (dx, dy) mm."""
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return 0.0
+        # GRBL caps the vector speed and acceleration so no axis exceeds its own
+        speed = math.inf
+        accel = math.inf
+        for d, v, a in zip((abs(dx), abs(dy)), self._speed, self.accel):
+            if d > 0:
+                share = d / length
+                speed = min(speed, v / share)
+                accel = min(accel, a / share)
+        return self.overhead + _trapezoid(length, speed, accel)
+
+    def __repr__(self) -> str:
+        return f"<MotionModel max_rate={self.max_rate}mm/min, accel={self.accel}mm/s^2>"
+
+
+def _trapezoid(length: float, speed: float, accel: float) -> float:
+    """Seconds to cover length from rest to rest, ramping at accel up to speed."""
+    if length * accel >= speed * speed:
+        # reaches full speed: ramp up, cruise, ramp down
+        return length / speed + speed / accel
+    # triangle profile: turns around before reaching full speed
+    return 2 * math.sqrt(length / accel)
+
+
+def plan_duration(plan: Plan, start: tuple[int, int], coords) -> float:
+    """
+    Predicted seconds to run a plan from a head position, including magnet
+    settle time. coords is the CoordinateModel whose move times to use.
+    """
+    total = 0.0
+    head = start
+    for op in plan:
+        if op.kind in (TRAVEL, CARRY):
+            total += coords.move_time(head, op.target)
+            head = op.target
+        elif op.kind in (MAGNET_ON, MAGNET_OFF):
+            total += MAGNET_SETTLE
+    return total
@@ -0,0 +1,231 @@
+"""
+Peephole optimizer for motion plans.
+
+Board compiles every low_level_move into travel / magnet on / carry / magnet
+off. Run back to back, most of that is wasted motion: a travel to the cell the
+head is already on, the magnet dropping and re-grabbing the same piece at
+every corner, and blockers cleared in whatever order the path listed them.
+optimize() removes that waste without changing where any piece ends up.
+"""
+
+from itertools import permutations
+from typing import Optional
+from game.calibration import CoordinateModel, default_model
+from game.plan import Plan, Op, TRAVEL, MAGNET_ON, MAGNET_OFF, CARRY
+
+# blocker clearing stages larger than this keep their order
+_MAX_REORDER = 5
+
+
+class PlanCost:
+    """Motion totals for a plan, starting from a given head position."""
+
+    def __init__(
+        self,
+        plan: Plan,
+        start: tuple[int, int],
+        coords: Optional[CoordinateModel] = None,
+    ):
+        coords = coords if coords is not None else default_model()
+        self.travel = 0.0  # mm moved with the magnet off
+        self.carry = 0.0  # mm moved with the magnet on
+        self.time = 0.0  # estimated seconds of motion
+        self.moves = 0  # motion commands sent to the plotter
+        self.magnet_switches = 0
+        head = start
+        for op in plan:
+            if op.kind in (TRAVEL, CARRY) and op.target != head:
+                d = coords.cell_distance(head, op.target)
+                self.time += coords.move_time(head, op.target)
+                if op.kind == TRAVEL:
+                    self.travel += d
+                else:
+                    self.carry += d
+                self.moves += 1
+                head = op.target
+            elif op.kind in (MAGNET_ON, MAGNET_OFF):
+                self.magnet_switches += 1
+
+    def __repr__(self) -> str:
+        return (
+            f"<PlanCost travel={self.travel:.0f}mm, carry={self.carry:.0f}mm, "
+            f"time={self.time:.1f}s, moves={self.moves}, magnet_switches={self.magnet_switches}>"
+        )
+
+
+def optimize(
+    plan: Plan, start: tuple[int, int], coords: Optional[CoordinateModel] = None
+) -> Plan:
+    """Return an equivalent plan with less head travel and magnet switching."""
+    coords = coords if coords is not None else default_model()
+    ops = _reorder_stages(list(plan), start, coords)
+    ops = _peephole(ops, start)
+    return Plan(ops)
+
+
+def report(
+    before: Plan,
+    after: Plan,
+    start: tuple[int, int],
+    coords: Optional[CoordinateModel] = None,
+) -> str:
+    b = PlanCost(before, start, coords)
+    a = PlanCost(after, start, coords)
+    return (
+        f"empty travel {b.travel:.0f}mm -> {a.travel:.0f}mm, "
+        f"motion {b.time:.1f}s -> {a.time:.1f}s, "
+        f"moves {b.moves} -> {a.moves}, "
+        f"magnet switches {b.magnet_switches} -> {a.magnet_switches}"
+    )
+
+
+# -------------------------
+# Blocker ordering
+# -------------------------
+
+
+def _units(ops: list[Op]) -> list[list[Op]]:
+    """Split an unoptimized plan into its low_level_move groups."""
+    units = []
+    for i in range(0, len(ops), 4):
+        unit = ops[i : i + 4]
+        kinds = [op.kind for op in unit]
+        if kinds != [TRAVEL, MAGNET_ON, CARRY, MAGNET_OFF]:
+            return []
+        units.append(unit)
+    return units
+
+
+def _cells(unit: list[Op]) -> set[tuple[int, int]]:
+    """Every cell a carry passes through, both ends included."""
+    (x0, y0), (x1, y1) = unit[0].target, unit[2].target
+    if x0 == x1:
+        return {(x0, y) for y in range(min(y0, y1), max(y0, y1) + 1)}
+    return {(x, y0) for x in range(min(x0, x1), max(x0, x1) + 1)}
+
+
+def _independent(group: list[list[Op]]) -> bool:
+    """True if no carry in the group crosses a cell another one starts or ends on."""
+    for a in group:
+        cells = _cells(a)
+        for b in group:
+            if a is b:
+                continue
+            if b[0].target in cells or b[2].target in cells:
+                return False
+    return True
+
+
+def _reorder_stages(
+    ops: list[Op], start: tuple[int, int], coords: CoordinateModel
+) -> list[Op]:
+    units = _units(ops)
+    if not units:
+        return ops
+
+    out: list[list[Op]] = []
+    head = start
+    i = 0
+    while i < len(units):
+        j = i
+        while j < len(units) and units[j][0].stage == units[i][0].stage:
+            j += 1
+        group = units[i:j]
+        pieces = {u[0].piece for u in group}
+        if (
+            1 < len(group) <= _MAX_REORDER
+            and len(pieces) == len(group)
+            and _independent(group)
+        ):
+            after = units[j][0].target if j < len(units) else None
+            group = _cheapest_order(group, head, after, coords)
+        out.extend(group)
+        head = group[-1][2].target
+        i = j
+    return [op for unit in out for op in unit]
+
+
+def _cheapest_order(group, head, after, coords: CoordinateModel):
+    # carries are fixed by the move, so only the empty travel between them varies
+    def cost(order) -> float:
+        total = 0.0
+        pos = head
+        for unit in order:
+            total += coords.move_time(pos, unit[0].target)
+            pos = unit[2].target
+        if after is not None:
+            total += coords.move_time(pos, after)
+        return total
+
+    return list(min(permutations(group), key=cost))
+
+
+# -------------------------
+# Peephole passes
+# -------------------------
+
+
+def _peephole(ops: list[Op], start: tuple[int, int]) -> list[Op]:
+    changed = True
+    while changed:
+        ops, a = _drop_idle_travel(ops, start)
+        ops, b = _hold_magnet(ops)
+        ops, c = _merge_carries(ops)
+        changed = a or b or c
+    return ops
+
+
+def _drop_idle_travel(ops: list[Op], start: tuple[int, int]) -> tuple[list[Op], bool]:
+    out = []
+    head = start
+    changed = False
+    for op in ops:
+        if op.kind == TRAVEL:
+            if op.target == head:
+                changed = True
+                continue
+            # consecutive travels: only the last destination matters
+            if out and out[-1].kind == TRAVEL:
+                out.pop()
+                changed = True
+        if op.kind in (TRAVEL, CARRY):
+            head = op.target
+        out.append(op)
+    return out, changed
+
+
+def _hold_magnet(ops: list[Op]) -> tuple[list[Op], bool]:
+    """Drop magnet off / on pairs between carries of the same piece."""
+    out: list[Op] = []
+    changed = False
+    for op in ops:
+        if (
+            op.kind == MAGNET_ON
+            and len(out) >= 2
+            and out[-1].kind == MAGNET_OFF
+            and out[-2].kind == CARRY
+            and out[-2].piece == op.piece
+        ):
+            out.pop()
+            changed = True
+            continue
+        out.append(op)
+    return out, changed
+
+
+def _merge_carries(ops: list[Op]) -> tuple[list[Op], bool]:
+    """Fold consecutive carries of one piece along the same axis into one."""
+    out: list[Op] = []
+    changed = False
+    for op in ops:
+        if (
+            op.kind == CARRY
+            and out
+            and out[-1].kind == CARRY
+            and out[-1].piece == op.piece
+            and out[-1].axis == op.axis
+        ):
+            out.pop()
+            changed = True
+        out.append(op)
+    return out, changed
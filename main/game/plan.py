@@ -0,0 +1,129 @@
+"""
+Motion plans: the primitive plotter operations a move compiles into.
+
+Board records every low_level_move as four ops (travel to the piece, magnet
+on, carry along one axis, magnet off) instead of driving the plotter
+directly. A Plan can be inspected, cached, costed and dry-run before the
+PlanExecutor runs it on a Plotter.
+"""
+
+from typing import Iterator, Optional
+
+TRAVEL = "travel"  # magnet off, any path
+MAGNET_ON = "magnet_on"
+MAGNET_OFF = "magnet_off"
+CARRY = "carry"  # magnet on, single axis
+
+
+class Op:
+    """One primitive plotter operation."""
+
+    __slots__ = ("kind", "target", "axis", "piece", "stage")
+
+    def __init__(
+        self,
+        kind: str,
+        target: Optional[tuple[int, int]] = None,
+        axis: Optional[str] = None,
+        piece: Optional[int] = None,
+        stage: int = 0,
+    ):
+        self.kind = kind
+        self.target = target  # board index for TRAVEL and CARRY
+        self.axis = axis  # "X" or "Y" for CARRY
+        self.piece = piece  # seat of the piece being moved
+        # ops of different pieces within one stage don't depend on each other
+        self.stage = stage
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Op) and (
+            self.kind,
+            self.target,
+            self.axis,
+            self.piece,
+            self.stage,
+        ) == (other.kind, other.target, other.axis, other.piece, other.stage)
+
+    def __repr__(self) -> str:
+        if self.kind == CARRY:
+            return f"<Op carry {self.axis} to {self.target}, piece={self.piece}>"
+        if self.kind == TRAVEL:
+            return f"<Op travel to {self.target}>"
+        return f"<Op {self.kind}>"
+
+
+class Plan:
+    """An ordered list of ops that carries out one move on the plotter."""
+
+    def __init__(self, ops: Optional[list[Op]] = None):
+        self.ops: list[Op] = ops if ops is not None else []
+        self._stage = 0
+
+    def new_stage(self) -> int:
+        """Start a new stage; later ops depend on everything before it."""
+        self._stage += 1
+        return self._stage
+
+    def carry(
+        self,
+        piece: int,
+        start: tuple[int, int],
+        target: tuple[int, int],
+        stage: Optional[int] = None,
+    ) -> None:
+        """Append the ops for carrying a piece from start to target on one axis."""
+        if start[0] == target[0]:
+            axis = "Y"
+        elif start[1] == target[1]:
+            axis = "X"
+        else:
+            raise ValueError(f"carry from {start} to {target} is not on one axis")
+        stage = self._stage if stage is None else stage
+        self.ops.append(Op(TRAVEL, start, piece=piece, stage=stage))
+        self.ops.append(Op(MAGNET_ON, piece=piece, stage=stage))
+        self.ops.append(Op(CARRY, target, axis, piece, stage))
+        self.ops.append(Op(MAGNET_OFF, piece=piece, stage=stage))
+
+    def __iter__(self) -> Iterator[Op]:
+        return iter(self.ops)
+
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def __repr__(self) -> str:
+        return "<Plan\n" + "\n".join(f"  {op}" for op in self.ops) + "\n>"
+
+
+class PlanExecutor:
+    """Runs a Plan on a Plotter."""
+
+    def __init__(self, plotter):
+        self.plotter = plotter
+
+    def run(self, plan: Plan) -> None:
+        """
+        Queue motion ops back to back and only wait for the plotter to stop
+        where it has to: before the magnet switches and at the end of the plan.
+        """
+        p = self.plotter
+        try:
+            for op in plan:
+                if op.kind == TRAVEL:
+                    print("PLOTTER: moving to", op.target)
+                    p.go_to(op.target, wait=False)
+                elif op.kind == MAGNET_ON:
+                    p.sync()
+                    p.magnet_on()
+                elif op.kind == CARRY:
+                    print("PLOTTER: carrying to", op.target)
+                    p.move_axis(op.target, wait=False)
+                elif op.kind == MAGNET_OFF:
+                    p.sync()
+                    p.magnet_off()
+                else:
+                    raise ValueError(f"Unknown plan op: {op.kind}")
+            p.sync()
+        except BaseException:
+            # never leave a piece stuck to the head if a move fails part way
+            p.magnet_off()
+            raise
@@ -1,6 +1,8 @@
 class Player:
     """Represents a player in the game."""
 
+    __slots__ = ("color", "type", "home", "pos", "locked", "finished")
+
     def __init__(self, color: str, type: str, home: tuple[int, int]):
         """
         Initialize a Player
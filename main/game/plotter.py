@@ -1,7 +1,22 @@
+import json
+import os
 import time
 import serial
+from contextlib import contextmanager
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from game.magnet import Magnet
-from game.constants import GRBL_COORDINATES, BASE_SLEEP, UNIT_SLEEP
+from game.grbl import GrblStatus, PlotterError, parse_setting, parse_status
+from game.grbl_stream import GrblStreamer
+from game.calibration import CoordinateModel, default_model
+from game.motion import MotionModel, plan_duration
+from game.plan import Plan
+from game.constants import (
+    MAGNET_SETTLE,
+    PLOTTER_STATE_FILE,
+    WARM_START_TOLERANCE,
+    STATUS_POLL_INTERVAL,
+    MOTION_TIMEOUT,
+)
 
 
 class Plotter:
@@ -12,6 +27,11 @@ class Plotter:
         magnet_pin: int | None = None,
         port: str = "/dev/ttyUSB0",
         baud: int = 115200,
+        sync_motion: bool = True,
+        streaming: bool = False,
+        diagonal_travel: bool = True,
+        coords: CoordinateModel | None = None,
+        state_file: str | None = PLOTTER_STATE_FILE,
     ):
         """
         Unified plotter controller.
@@ -21,14 +41,37 @@ class Plotter:
         - start_index: starting (x, y) board index.
         - magnet_pin: optional GPIO pin to control an electromagnet; if provided, a `Magnet` is created.
         - port, baud: serial settings used when opening a new connection.
+        - sync_motion: wait for GRBL to report the motion finished instead of
+          sleeping for the motion model's predicted duration. Turned off
+          automatically if GRBL doesn't answer status queries.
+        - streaming: after initialization, stream G-code with character-counting
+          flow control instead of waiting for each line's `ok`.
+        - diagonal_travel: send magnet-off moves as one combined `G0 X Y` instead
+          of an X move followed by a Y move.
+        - coords: board-to-machine coordinate model; defaults to the calibration file.
+        - state_file: where the last known board index is kept between sessions so
+          an idle, already-positioned machine can skip waking and re-homing.
+          None disables warm starts.
         """
         self.port = port
         self.baud = baud
+        self.sync_motion = sync_motion
+        self.diagonal_travel = diagonal_travel
         self.ser = ser if ser is not None else self._open_plotter()
-        self.board = GRBL_COORDINATES
+        self.coords = coords if coords is not None else default_model()
+        self.settings: dict[int, float] = {}  # GRBL `$$` settings, read at startup
         self.current_index = start_index
         self.magnet = Magnet(magnet_pin) if magnet_pin is not None else None
+        self.streamer: GrblStreamer | None = None
+        self.state_file = state_file
+        # work coordinate offset (MPos - WPos) after G92, for MPos-only reports
+        self._wco: tuple[float, float] | None = None
+        self._saved_index: tuple[int, int] | None = None
+        # estimated seconds of motion queued since the last sync()
+        self._queued_time = 0.0
         self.plotter_initialization()
+        if streaming:
+            self.streamer = GrblStreamer(self.ser)
 
     # -------------------------
     # Serial helpers (merged from plotter_helpers.py)
@@ -43,19 +86,30 @@ class Plotter:
         Safely close the plotter serial port, returning to (0,0).
         """
         if self.ser is not None and self.ser.is_open:
-            distances = self._target_distance((0, 0))
+            x, y = self.coords.position(self.current_index)
+            motion = self.coords.motion
             # Return to (0,0) at the end
             self.send_grbl("G0 X0")
-            time.sleep(BASE_SLEEP + distances[0] * UNIT_SLEEP)
             self.send_grbl("G0 Y0")
-            time.sleep(BASE_SLEEP + distances[1] * UNIT_SLEEP)
+            self._queue_motion(motion.move_time(x, 0) + motion.move_time(0, y))
+            self.sync()
+            # at the work origin, between cells
+            self._save_state(None)
+            if self.streamer is not None:
+                self.streamer.close()
+                self.streamer = None
             print("[PLOTTER] Closing serial port")
             self.ser.close()
 
     def send_grbl(self, command: str):
         """
         Send one line of G-code and print GRBL's response.
+        When streaming, the line is queued and errors surface at the next sync().
         """
+        if self.streamer is not None:
+            self.streamer.send([command])
+            return
+
         line = command.strip()
         print(f"> {line}")
 
@@ -83,42 +137,324 @@ class Plotter:
                 "report_position called with a closed or None serial port"
             )
 
-        self.ser.write(b"?")
-        time.sleep(0.2)  # wait for GRBL to respond
-        resp = self.ser.read_all().decode("ascii", errors="ignore")
-        print(resp.strip())
+        status = self.query_status()
+        print(status)
+        return status
+
+    def query_status(self, timeout: float = 1.0) -> GrblStatus:
+        """Send a real-time '?' and return the next status report."""
+        if self.ser is None or not self.ser.is_open:
+            raise RuntimeError("query_status called with a closed or None serial port")
+        if self.streamer is not None:
+            return self.streamer.query_status(timeout)
+
+        with self._poll_timeout():
+            self._discard_stale_reports()
+            self.ser.write(b"?")
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                status = parse_status(self._read_line())
+                if status is not None:
+                    return status
+        raise PlotterError("GRBL did not answer a status query")
+
+    def wait_for_idle(self, timeout: float = MOTION_TIMEOUT):
+        """
+        Block until every queued motion has finished.
+
+        Queues a zero-length dwell (G4 P0), which GRBL only acknowledges once
+        the planner is empty, and polls '?' meanwhile so an alarm or hold is
+        noticed instead of waiting out the timeout.
+        """
+        if self.ser is None or not self.ser.is_open:
+            raise RuntimeError("wait_for_idle called with a closed or None serial port")
+        if self.streamer is not None:
+            self._wait_for_idle_streaming(timeout)
+            return
+
+        with self._poll_timeout():
+            self._wait_for_dwell(timeout)
+
+    def _wait_for_dwell(self, timeout: float):
+        self.ser.write(b"G4 P0\n")
+        deadline = time.monotonic() + timeout
+        last_poll = 0.0
+        while True:
+            now = time.monotonic()
+            if now > deadline:
+                raise PlotterError(f"motion did not finish within {timeout}s")
+            if now - last_poll >= STATUS_POLL_INTERVAL:
+                self.ser.write(b"?")
+                last_poll = now
+
+            response = self._read_line()
+            if not response:
+                continue
+            if response == "ok":
+                return
+            if response.startswith("error") or response.startswith("ALARM"):
+                raise PlotterError(f"GRBL reported {response} while moving")
+            status = parse_status(response)
+            if status is not None and status.alarm:
+                raise PlotterError(f"GRBL entered {status.state} while moving")
+
+    def _wait_for_idle_streaming(self, timeout: float):
+        done = self.streamer.send(["G4 P0"])
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                done.result(timeout=STATUS_POLL_INTERVAL)
+                break
+            except FutureTimeout:
+                pass
+            if time.monotonic() > deadline:
+                raise PlotterError(f"motion did not finish within {timeout}s")
+            status = self.streamer.query_status()
+            if status.alarm:
+                raise PlotterError(f"GRBL entered {status.state} while moving")
+        self.streamer.check()
+
+    def stream(self, lines: list[str]) -> Future:
+        """
+        Queue a batch of G-code lines, for example a whole compiled turn, and
+        return a Future that resolves once GRBL has accepted all of them.
+        Requires streaming mode.
+        """
+        if self.streamer is None:
+            raise RuntimeError("stream called without streaming enabled")
+        return self.streamer.send(lines)
+
+    def read_settings(self, timeout: float = 2.0) -> dict[int, float]:
+        """
+        List GRBL's settings with `$$` and cache them in self.settings.
+        Call before streaming starts; the streamer owns the serial input after that.
+        """
+        if self.ser is None or not self.ser.is_open:
+            raise RuntimeError("read_settings called with a closed or None serial port")
+        if self.streamer is not None:
+            raise RuntimeError("read_settings called while streaming")
+
+        self.ser.write(b"$$\n")
+        settings: dict[int, float] = {}
+        deadline = time.monotonic() + timeout
+        with self._poll_timeout():
+            while time.monotonic() < deadline:
+                response = self._read_line()
+                if response == "ok":
+                    self.settings = settings
+                    return settings
+                if response.startswith("error"):
+                    raise PlotterError(f"GRBL reported {response} listing settings")
+                setting = parse_setting(response)
+                if setting is not None:
+                    settings[setting[0]] = setting[1]
+        raise PlotterError("GRBL did not list its settings")
+
+    @contextmanager
+    def _poll_timeout(self):
+        """
+        Shorten the read timeout to one status poll period for a polling loop.
+        Set once per loop: with pyserial every change reconfigures the port.
+        """
+        old_timeout = self.ser.timeout
+        self.ser.timeout = STATUS_POLL_INTERVAL
+        try:
+            yield
+        finally:
+            self.ser.timeout = old_timeout
+
+    def _read_line(self) -> str:
+        """Read one response line; inside _poll_timeout, waits one poll period at most."""
+        return self.ser.readline().decode("ascii", errors="ignore").strip()
+
+    def _discard_stale_reports(self):
+        """Drop reports left over from an earlier '?' so they can't answer a new one."""
+        while self.ser.in_waiting:
+            response = self._read_line()
+            if response and parse_status(response) is None:
+                print("GRBL:", response)
+
+    def _queue_motion(self, estimate: float):
+        self._queued_time += estimate
+
+    def sync(self):
+        """
+        Wait for all queued motion: GRBL sync if enabled, else sleep for the
+        predicted duration of what was queued.
+        """
+        estimate, self._queued_time = self._queued_time, 0.0
+        if self.sync_motion:
+            self.wait_for_idle()
+        elif estimate > 0:
+            time.sleep(estimate)
+
+    def save_state(self):
+        """
+        Record the head's cell for a warm start, once it has stopped there.
+        Called at the end of a turn rather than on every sync(), to spare the
+        SD card; nothing is written if the cell hasn't changed.
+        """
+        if self.current_index != self._saved_index:
+            self._save_state(self.current_index)
 
     def plotter_initialization(self):
         """
         Wake up GRBL, unlock, and set coordinate mode.
+
+        If GRBL already answers a status query, the wake-up delay is skipped.
+        If it is also idle at the position saved in the state file, the work
+        origin and board index are kept and no homing move is made.
         """
         if self.ser is None or not self.ser.is_open:
             raise RuntimeError(
                 "plotter_initialization called with a closed or None serial port"
             )
 
-        # Wake up GRBL
-        self.ser.write(b"\r\n\r\n")
-        time.sleep(2)
-        self.ser.reset_input_buffer()
+        status = self._probe_status()
+        if status is None:
+            # Wake up GRBL
+            self.ser.write(b"\r\n\r\n")
+            time.sleep(2)
+            self.ser.reset_input_buffer()
+            status = self._probe_status()
+        if status is None and self.sync_motion:
+            print("[PLOTTER] No status reports, timing moves with the motion model")
+            self.sync_motion = False
+
+        if status is None or status.alarm:
+            self.send_grbl("$X")  # unlock
+        if self._warm_start(status):
+            self.send_grbl("G90")  # absolute positioning
+            self._load_motion_model()
+            if self.current_index is None:
+                # closed at the work origin last time; only the home move is needed
+                self._home()
+            return
 
-        # Unlock GRBL and set coordinates
-        self.send_grbl("$X")  # unlock
+        # Set coordinates
         self.send_grbl("G92 X0 Y0")  # set current pos as (0,0)
         self.send_grbl("G90")  # absolute positioning
-        home = self._index_to_grbl((0, 0))
-        self.send_grbl("G0 " + home[0])
-        time.sleep(BASE_SLEEP + 100 * UNIT_SLEEP)
-        self.send_grbl("G0 " + home[1])
-        time.sleep(BASE_SLEEP + 100 * UNIT_SLEEP)
+        self._load_motion_model()
+        self._wco = self._read_wco()
+        self._home()
+
+    def _home(self):
+        """Drive from the work origin to board cell (0, 0)."""
+        self.send_grbl(self.coords.gcode((0, 0)))
+        self._queue_motion(self.coords.motion.move_time(*self.coords.position((0, 0))))
+        self.current_index = (0, 0)
+        self.sync()
+        self.save_state()
+
+    def resync(self):
+        """
+        Put the head back on current_index after a move failed part way.
+        Unlocks GRBL if it raised an alarm, then sends one absolute rapid with
+        both axes, which ends on the cell wherever the head stopped.
+        """
+        self._queued_time = 0.0
+        status = self._probe_status()
+        if status is None or status.alarm:
+            self.send_grbl("$X")  # unlock
+        self.send_grbl(self.coords.gcode(self.current_index))
+        # from an unknown point; the move from the work origin is a fair bound
+        self._queue_motion(
+            self.coords.motion.move_time(*self.coords.position(self.current_index))
+        )
+        self.sync()
+
+    def _probe_status(self) -> GrblStatus | None:
+        """One quick status query; None if GRBL doesn't answer (e.g. still booting)."""
+        try:
+            return self.query_status(timeout=0.5)
+        except PlotterError:
+            return None
+
+    def _read_wco(self) -> tuple[float, float] | None:
+        """Work coordinate offset right after G92, while WPos is (0, 0)."""
+        status = self._probe_status()
+        if status is None:
+            return None
+        if status.wco is not None:
+            return status.wco[:2]
+        if status.mpos is not None:
+            return status.mpos[:2]
+        return None
 
     # -------------------------
-    # Internal helpers
+    # Warm start
     # -------------------------
 
-    def _index_to_grbl(self, index: tuple[int, int]) -> tuple[str, str]:
-        x, y = index
-        return self.board[x][y]
+    def _warm_start(self, status: GrblStatus | None) -> bool:
+        """
+        Resume from the state file if GRBL is idle where we left it.
+        Sets current_index to the saved cell, or None if the head was parked
+        at the work origin.
+        """
+        saved = self._load_state()
+        if status is None or not status.idle or saved is None:
+            return False
+
+        index = tuple(saved["index"]) if saved["index"] is not None else None
+        wco = tuple(saved["wco"]) if saved["wco"] is not None else None
+        expected = self.coords.position(index) if index is not None else (0.0, 0.0)
+        if status.wpos is not None:
+            reported = status.wpos[:2]
+        elif status.mpos is not None and (status.wco or wco) is not None:
+            offset = status.wco or wco
+            reported = (status.mpos[0] - offset[0], status.mpos[1] - offset[1])
+        else:
+            return False
+        if any(abs(r - e) > WARM_START_TOLERANCE for r, e in zip(reported, expected)):
+            print(f"[PLOTTER] Head at {reported}, expected {expected}; re-homing")
+            return False
+
+        print(f"[PLOTTER] Warm start at board index {index}")
+        self.current_index = index
+        self._saved_index = index
+        self._wco = wco
+        return True
+
+    def _load_state(self) -> dict | None:
+        if self.state_file is None or not os.path.exists(self.state_file):
+            return None
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+            return {"index": state["index"], "wco": state.get("wco")}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[PLOTTER] Ignoring state file {self.state_file}: {e}")
+            return None
+
+    def _save_state(self, index: tuple[int, int] | None):
+        """Record where the head is, after it has stopped there."""
+        self._saved_index = index
+        if self.state_file is None:
+            return
+        state = {"index": index, "wco": self._wco}
+        tmp = self.state_file + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp, self.state_file)
+        except OSError as e:
+            print(f"[PLOTTER] Could not save state to {self.state_file}: {e}")
+
+    def _load_motion_model(self):
+        """Time moves from the controller's max rate and acceleration settings."""
+        try:
+            settings = self.read_settings()
+        except PlotterError as e:
+            print(f"[PLOTTER] {e}, using default motion settings")
+            settings = {}
+        motion = MotionModel.from_settings(settings)
+        print(f"[PLOTTER] {motion}")
+        self.coords = self.coords.with_motion(motion)
+
+    def predict(self, plan: Plan, start: tuple[int, int] | None = None) -> float:
+        """Predicted seconds to run a plan, from the current head position by default."""
+        start = self.current_index if start is None else start
+        return plan_duration(plan, start, self.coords)
 
     # -------------------------
     # Public movement API
@@ -140,43 +476,74 @@ class Plotter:
         if x_grbl is not None:
             self.send_grbl("G0 " + x_grbl)
             print("MOVE CALL RETURNED")
-            time.sleep(5)
 
         if y_grbl is not None:
             self.send_grbl("G0 " + y_grbl)
-            time.sleep(5)
+        self._queue_motion(10)
+        self.sync()
 
-    def _target_distance(self, target_index: tuple[int, int]) -> tuple[float, float]:
+    def go_to(self, target_index: tuple[int, int], wait: bool = True):
         """
-        Calculate the absolute distance between current and target GRBL coordinates.
-
-        Returns:
-            tuple of (distance_x, distance_y)
+        Move plotter to a board index with magnet OFF.
+        No axis restrictions: with diagonal_travel both axes move in one rapid.
+        With wait=False the move is only queued; call sync() before relying on it.
         """
-        target_x, target_y = self._index_to_grbl(target_index)
-        current_x, current_y = self._index_to_grbl(self.current_index)
-        return (
-            abs(float(target_x[1:]) - float(current_x[1:])),
-            abs(float(target_y[1:]) - float(current_y[1:])),
-        )
+        if target_index == self.current_index:
+            return
+
+        if self.diagonal_travel:
+            self._rapid(target_index)
+        else:
+            # X first, then Y, through the cell at the corner of the two
+            self._rapid((target_index[0], self.current_index[1]))
+            self._rapid(target_index)
+        if wait:
+            self.sync()
+
+    def _rapid(self, target_index: tuple[int, int]):
+        """Queue one straight rapid to a cell and its estimated duration."""
+        if target_index == self.current_index:
+            return
+        self.send_grbl(self.coords.gcode(target_index, self.current_index))
+        self._queue_motion(self.coords.move_time(self.current_index, target_index))
+        self.current_index = target_index
 
-    def go_to(self, target_index: tuple[int, int]):
+    def magnet_on(self):
+        """Energize the magnet and give it time to grab the piece."""
+        if self.magnet is not None:
+            self.magnet.on()
+            time.sleep(MAGNET_SETTLE)
+
+    def magnet_off(self):
+        """Release the magnet and give the piece time to drop."""
+        if self.magnet is not None:
+            self.magnet.off()
+            time.sleep(MAGNET_SETTLE)
+
+    def move_axis(self, target_index: tuple[int, int], wait: bool = True):
         """
-        Move plotter to a board index with magnet OFF.
-        No axis restrictions.
+        Move plotter to a board index along a single axis.
+        Leaves the magnet as it is.
+        With wait=False the move is only queued; call sync() before relying on it.
         """
         if target_index == self.current_index:
             return
 
-        target_x, target_y = self._index_to_grbl(target_index)
-        distances = self._target_distance(target_index)
-        self.send_grbl("G0 " + target_x)
-        time.sleep(BASE_SLEEP + distances[0] * UNIT_SLEEP)
+        current_x, current_y = self.current_index
+        target_x, target_y = target_index
 
-        self.send_grbl("G0 " + target_y)
-        time.sleep(BASE_SLEEP + distances[1] * UNIT_SLEEP)
+        if current_x != target_x and current_y != target_y:
+            raise RuntimeError(
+                f"Illegal carry_to move: "
+                f"current_index={self.current_index}, "
+                f"target_index={target_index}. "
+                f"Can only move along one axis."
+            )
 
-        self.current_index = target_index
+        # one board axis only; with a skewed calibration both motors may turn
+        self._rapid(target_index)
+        if wait:
+            self.sync()
 
     def carry_to(self, target_index: tuple[int, int]):
         """
@@ -186,37 +553,8 @@ class Plotter:
         if target_index == self.current_index:
             return
 
-        current_x, current_y = self.current_index
-        target_x, target_y = target_index
-        distances = self._target_distance(target_index)
-        x_grbl, y_grbl = self._index_to_grbl(target_index)
-
-        if self.magnet is not None:
-            self.magnet.on()
-            time.sleep(0.2)
-
+        self.magnet_on()
         try:
-            # Y movement only
-            if current_x == target_x and current_y != target_y:
-                self.send_grbl("G0 " + y_grbl)
-                time.sleep(BASE_SLEEP + distances[1] * UNIT_SLEEP)
-
-            # X movement only
-            elif current_y == target_y and current_x != target_x:
-                self.send_grbl("G0 " + x_grbl)
-                time.sleep(BASE_SLEEP + distances[0] * UNIT_SLEEP)
-
-            else:
-                raise RuntimeError(
-                    f"Illegal carry_to move: "
-                    f"current_index={self.current_index}, "
-                    f"target_index={target_index}. "
-                    f"Can only move along one axis."
-                )
-
-            self.current_index = target_index
-
+            self.move_axis(target_index)
         finally:
-            if self.magnet is not None:
-                self.magnet.off()
-                time.sleep(0.2)
+            self.magnet_off()
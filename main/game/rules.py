@@ -0,0 +1,90 @@
+"""
+Pure game rules.
+
+Everything here works on a BoardState and returns new values; nothing touches
+the plotter, GPIO or serial ports. Board uses these decisions and then carries
+them out on the hardware.
+"""
+
+from typing import Optional
+from game.constants import ROLL_AGAIN
+from game.state import BoardState
+from game import track
+
+
+class MoveResult:
+    """Outcome of one roll for one seat."""
+
+    def __init__(
+        self,
+        state: BoardState,
+        seat: int,
+        start: Optional[int],
+        target: Optional[int],
+        captures: tuple[int, ...] = (),
+    ):
+        self.state = state
+        self.seat = seat
+        self.start = start
+        self.target = target
+        self.captures = captures
+
+    @property
+    def moved(self) -> int:
+        """Number of cells the piece travelled (0 if it stayed put)."""
+        if self.target is None:
+            return 0
+        return (self.target - self.start) % track.TRACK_LENGTH
+
+    @property
+    def finished(self) -> bool:
+        """True if the piece moved and landed on its own home."""
+        return self.target is not None and self.target == self.state.home[self.seat]
+
+    def __repr__(self) -> str:
+        return (
+            f"<MoveResult seat={self.seat}, start={self.start}, "
+            f"target={self.target}, captures={self.captures}>"
+        )
+
+
+def target(state: BoardState, seat: int, roll: int) -> Optional[int]:
+    """
+    Return the ordinal the seat's piece would move to, or None if it can't move
+    (locked, or the piece on the target can't be sent home because its home is
+    occupied).
+    """
+    start = state.ordinal(seat)
+    if start is None or state.is_locked(seat):
+        return None
+    t = (start + roll) % track.TRACK_LENGTH
+    victim = state.occupant(t)
+    if victim is not None and victim != seat:
+        if state.occupant(state.home[victim]) is not None:
+            # can't capture because home is blocked
+            return None
+    return t
+
+
+def apply_roll(state: BoardState, seat: int, roll: int) -> MoveResult:
+    """Apply a roll for `seat` and return the resulting state and captures."""
+    start = state.ordinal(seat)
+    if start is None:
+        raise ValueError(f"seat {seat} has no piece on the board")
+    if state.is_locked(seat):
+        # a locked piece is released by a ROLL_AGAIN but doesn't move
+        return MoveResult(
+            state.with_locked(seat, roll != ROLL_AGAIN), seat, start, None
+        )
+
+    t = target(state, seat, roll)
+    if t is None:
+        return MoveResult(state, seat, start, None)
+
+    captures: tuple[int, ...] = ()
+    victim = state.occupant(t)
+    if victim is not None and victim != seat:
+        state = state.with_piece(victim, state.home[victim], True)
+        captures = (victim,)
+    state = state.with_piece(seat, t, False)
+    return MoveResult(state, seat, start, t, captures)
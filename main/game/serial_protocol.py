@@ -282,7 +282,7 @@ class ControlPanelProtocol:
         player_index = color.value
         self._send_message(f"T{player_index}")
 
-    def send_victory(self, color: PlayerColor):
+    def send_victory(self, color: PlayerColor, wait: bool = True):
         """
         Announce that a player has finished the game.
 
@@ -293,6 +293,8 @@ class ControlPanelProtocol:
 
         Args:
             color: Which player finished (BLUE=0, RED=1, GREEN=2, YELLOW=3)
+            wait: Sleep through the celebration. Without it, a message sent
+                meanwhile waits in the panel's serial buffer until it is over.
 
         Example:
             if player_finished_game:
@@ -301,7 +303,8 @@ class ControlPanelProtocol:
         """
         player_index = color.value
         self._send_message(f"V{player_index}")
-        time.sleep(3.5)  # Wait for victory sequence
+        if wait:
+            time.sleep(3.5)  # Wait for victory sequence
 
     # ===== HELPER METHODS =====
 
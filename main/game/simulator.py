@@ -0,0 +1,212 @@
+"""
+Vectorized Monte Carlo simulator.
+
+Plays thousands of games in lockstep as NumPy arrays of track ordinals, one
+vectorized step per die roll, following the same rules as game.rules and the
+turn loop in Game.run: a locked piece is released by a ROLL_AGAIN without
+moving, a ROLL_AGAIN gives the same player another roll, a captured piece goes
+home locked, a capture is refused while the victim's home is occupied, and a
+player finishes when the last move of their turn lands on their home.
+"""
+
+import numpy as np
+from game.constants import ROLL_AGAIN
+from game.state import NUM_SEATS, DEFAULT_HOMES, seat_of
+from game import track
+
+EMPTY = -1
+# drop finished games from the working arrays once fewer than this fraction
+# are still running; game lengths have a long tail
+_COMPACT_BELOW = 0.5
+
+
+class SimulationResult:
+    """Finishing order and game lengths for a batch of games."""
+
+    def __init__(
+        self,
+        order: tuple[str, ...],
+        ranks: np.ndarray,
+        turns: np.ndarray,
+        rolls: np.ndarray,
+        completed: np.ndarray,
+    ):
+        self.order = order  # colours in seat order, first mover first
+        # (games, len(order)) finishing place, 0 = winner, -1 = never finished
+        self.ranks = ranks
+        self.turns = turns  # (games,) player turns until the game ended
+        self.rolls = rolls  # (games,) die rolls until the game ended
+        self.completed = completed  # (games,) False if max_rolls was hit
+
+    @property
+    def games(self) -> int:
+        return len(self.turns)
+
+    def win_rates(self) -> dict[str, float]:
+        """Fraction of completed games each colour finished first."""
+        done = self.ranks[self.completed]
+        if len(done) == 0:
+            return {c: 0.0 for c in self.order}
+        return {c: float(np.mean(done[:, i] == 0)) for i, c in enumerate(self.order)}
+
+    def length_histogram(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return (turn counts, number of games) for completed games."""
+        values, counts = np.unique(self.turns[self.completed], return_counts=True)
+        return values, counts
+
+    def length_percentiles(self, q=(5, 25, 50, 75, 95)) -> dict[int, float]:
+        lengths = self.turns[self.completed]
+        if len(lengths) == 0:
+            return {}
+        return {p: float(v) for p, v in zip(q, np.percentile(lengths, q))}
+
+    def __repr__(self) -> str:
+        rates = ", ".join(f"{c}={r:.3f}" for c, r in self.win_rates().items())
+        return (
+            f"<SimulationResult order={self.order}, games={self.games}, "
+            f"win_rates=({rates}), median_turns={np.median(self.turns):.0f}>"
+        )
+
+
+def simulate(
+    order: list[str],
+    games: int = 10000,
+    rng: np.random.Generator | None = None,
+    max_rolls: int = 5000,
+) -> SimulationResult:
+    """
+    Play `games` games with the colours in `order` taking turns in that order,
+    all pieces starting locked on their homes.
+    """
+    if len(order) < 2:
+        raise ValueError("need at least two players to simulate a game")
+    rng = np.random.default_rng() if rng is None else rng
+
+    k = len(order)
+    seats = np.array([seat_of(c) for c in order])  # turn slot -> seat
+    home = np.array(DEFAULT_HOMES)
+
+    # per-game results, filled in as games leave the working set
+    out_ranks = np.full((games, k), -1, dtype=np.int8)
+    out_turns = np.zeros(games, dtype=np.int32)
+    out_rolls = np.zeros(games, dtype=np.int32)
+    out_completed = np.zeros(games, dtype=bool)
+
+    # working set: one row per game still being played
+    ids = np.arange(games)
+    pos = np.full((games, NUM_SEATS), EMPTY, dtype=np.int8)
+    pos[:, seats] = home[seats]
+    locked = np.ones((games, NUM_SEATS), dtype=bool)
+    ranks = np.full((games, k), -1, dtype=np.int8)
+    done = np.zeros((games, k), dtype=bool)  # per turn slot
+    num_done = np.zeros(games, dtype=np.int8)
+    slot = np.zeros(games, dtype=np.int8)
+    turns = np.zeros(games, dtype=np.int32)
+    rolls = np.zeros(games, dtype=np.int32)
+    active = np.ones(games, dtype=bool)
+
+    def flush(rows: np.ndarray) -> None:
+        out_ranks[ids[rows]] = ranks[rows]
+        out_turns[ids[rows]] = turns[rows]
+        out_rolls[ids[rows]] = rolls[rows]
+        out_completed[ids[rows]] = num_done[rows] >= k - 1
+
+    for _ in range(max_rolls):
+        n_active = int(active.sum())
+        if n_active == 0:
+            break
+        if n_active < _COMPACT_BELOW * len(ids):
+            flush(~active)
+            ids, pos, locked, ranks, done = (
+                a[active] for a in (ids, pos, locked, ranks, done)
+            )
+            num_done, slot, turns, rolls = (
+                a[active] for a in (num_done, slot, turns, rolls)
+            )
+            active = active[active]
+
+        n = len(ids)
+        rows = np.arange(n)
+        roll = rng.integers(1, 7, size=n, dtype=np.int8)
+        seat = seats[slot]
+        start = pos[rows, seat]
+        was_locked = locked[rows, seat]
+
+        # locked pieces are released by a ROLL_AGAIN and don't move
+        unlock = active & was_locked & (roll == ROLL_AGAIN)
+        locked[rows[unlock], seat[unlock]] = False
+
+        target = (start + roll) % track.TRACK_LENGTH
+        on_target = pos == target[:, None]
+        on_target[rows, seat] = False
+        has_victim = on_target.any(axis=1)
+        victim = on_target.argmax(axis=1)
+        victim_home = home[victim]
+        home_blocked = (pos == victim_home[:, None]).any(axis=1)
+
+        moves = active & ~was_locked & ~(has_victim & home_blocked)
+        capture = moves & has_victim
+        pos[rows[capture], victim[capture]] = victim_home[capture]
+        locked[rows[capture], victim[capture]] = True
+        pos[rows[moves], seat[moves]] = target[moves]
+
+        rolls += active
+        # the turn ends on anything but a ROLL_AGAIN; only then is a finish checked
+        ends = active & (roll != ROLL_AGAIN)
+        finish = ends & moves & (target == home[seat])
+        ranks[rows[finish], slot[finish]] = num_done[finish]
+        done[rows[finish], slot[finish]] = True
+        num_done += finish
+        turns += ends
+        active &= num_done < k - 1
+
+        # hand the turn to the next player who hasn't finished
+        nxt = slot.copy()
+        found = np.zeros(n, dtype=bool)
+        for offset in range(1, k + 1):
+            cand = (slot + offset) % k
+            take = ~found & ~done[rows, cand]
+            nxt[take] = cand[take]
+            found |= take
+        slot = np.where(ends & active, nxt, slot).astype(np.int8)
+
+    flush(np.ones(len(ids), dtype=bool))
+    # the last player left takes the final place
+    last = out_completed[:, None] & (out_ranks < 0)
+    out_ranks[last] = k - 1
+    return SimulationResult(
+        tuple(order), out_ranks, out_turns, out_rolls, out_completed
+    )
+
+
+def seat_orders(colors: list[str]) -> list[tuple[str, ...]]:
+    """Every order Game.determine_order can produce: rotations of the player list."""
+    return [tuple(colors[i:] + colors[:i]) for i in range(len(colors))]
+
+
+def simulate_orders(
+    colors: list[str],
+    games: int = 10000,
+    seed: int | None = None,
+    max_rolls: int = 5000,
+) -> dict[tuple[str, ...], SimulationResult]:
+    """Simulate every seat order for a set of colours."""
+    rng = np.random.default_rng(seed)
+    return {
+        order: simulate(list(order), games, rng, max_rolls)
+        for order in seat_orders(colors)
+    }
+
+
+def main():
+    colors = ["BLUE", "RED", "GREEN", "YELLOW"]
+    for order, result in simulate_orders(colors, games=20000, seed=0).items():
+        print(" -> ".join(order))
+        for color, rate in result.win_rates().items():
+            print(f"   {color:<6} wins {rate:6.1%}")
+        print(f"   turns percentiles: {result.length_percentiles()}")
+        print(f"   incomplete: {int((~result.completed).sum())}")
+
+
+if __name__ == "__main__":
+    main()
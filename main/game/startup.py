@@ -0,0 +1,84 @@
+"""
+Parallel device bring-up.
+
+The control panel waits for its Arduino to reset, the plotter for GRBL and
+its homing move, and the camera for its first frame. None of them depend on
+each other, so they start on worker threads at the same time. Startup then
+takes as long as the slowest device instead of the sum of all three.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Optional
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+
+class DeviceStartup:
+    """Readiness of one device being brought up on its own thread."""
+
+    def __init__(self, name: str, start: Callable[[], Any]):
+        self.name = name
+        self.status = PENDING
+        self.value: Any = None  # whatever start() returned
+        self.error: Optional[BaseException] = None
+        self.elapsed = 0.0
+        self.ready = threading.Event()  # set once the device is ready or failed
+        self._start = start
+        self._thread = threading.Thread(
+            target=self._run, name=f"startup-{name}", daemon=True
+        )
+
+    def _run(self) -> None:
+        t0 = time.monotonic()
+        try:
+            self.value = self._start()
+            self.status = READY
+        except BaseException as e:
+            self.error = e
+            self.status = FAILED
+        self.elapsed = time.monotonic() - t0
+        if self.status == READY:
+            print(f"[STARTUP] {self.name} ready in {self.elapsed:.2f}s")
+        else:
+            print(
+                f"[STARTUP] {self.name} failed after {self.elapsed:.2f}s: {self.error}"
+            )
+        self.ready.set()
+
+    def __repr__(self) -> str:
+        return f"<DeviceStartup {self.name} {self.status}>"
+
+
+def start_devices(
+    starters: dict[str, Callable[[], Any]], timeout: Optional[float] = None
+) -> dict[str, DeviceStartup]:
+    """
+    Run every starter concurrently and wait for all of them to finish.
+    Devices still starting after the timeout are reported as failed.
+    """
+    devices = {name: DeviceStartup(name, start) for name, start in starters.items()}
+    t0 = time.monotonic()
+    for device in devices.values():
+        device._thread.start()
+
+    deadline = None if timeout is None else t0 + timeout
+    for device in devices.values():
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if not device.ready.wait(remaining):
+            device.status = FAILED
+            device.error = TimeoutError(f"not ready after {timeout}s")
+            print(f"[STARTUP] {device.name} timed out after {timeout}s")
+
+    print(f"[STARTUP] devices up in {time.monotonic() - t0:.2f}s")
+    return devices
+
+
+def check_devices(devices: dict[str, DeviceStartup]) -> None:
+    """Raise RuntimeError naming every device that failed to start."""
+    failed = [d for d in devices.values() if d.status != READY]
+    if failed:
+        details = "; ".join(f"{d.name}: {d.error}" for d in failed)
+        raise RuntimeError(f"Device startup failed ({details})")
@@ -0,0 +1,148 @@
+from typing import Optional, Sequence
+from game.constants import PlayerColor, PLAYER_TO_HOME, BOARD_X, BOARD_Y
+from game import track
+
+# one seat per panel colour, indexed by PlayerColor value
+NUM_SEATS = len(PlayerColor)
+SEAT_COLORS: tuple[str, ...] = tuple(c.name for c in PlayerColor)
+DEFAULT_HOMES: tuple[int, ...] = tuple(
+    track.ordinal(PLAYER_TO_HOME[c]) for c in SEAT_COLORS
+)
+
+# pos byte for a seat that has no piece on the board
+NO_PIECE = 0xFF
+
+# track ordinal -> index into the flattened BOARD_X x BOARD_Y grid
+CELL: tuple[int, ...] = tuple(x * BOARD_Y + y for x, y in track.RING)
+_EMPTY_GRID = bytes(BOARD_X * BOARD_Y)
+
+
+def seat_of(color: str) -> int:
+    """Return the seat index (PlayerColor value) for a colour name."""
+    return PlayerColor[color].value
+
+
+def cell_index(pos: tuple[int, int]) -> int:
+    """Index of a board position in BoardState.grid."""
+    return pos[0] * BOARD_Y + pos[1]
+
+
+class BoardState:
+    """
+    Hardware-free snapshot of the game, small enough to allocate by the million.
+
+    - pos: one byte per seat, the track ordinal of its piece (NO_PIECE if absent)
+    - grid: one byte per board cell, seat + 1 of the piece on it (0 if empty)
+    - locked: bitmask, bit `seat` set while that seat's piece is locked
+    - home: track ordinal of each seat's home (shared, never copied)
+
+    Instances are immutable: copy() is free and the hash is computed once.
+    Rules return new states.
+    """
+
+    __slots__ = ("pos", "grid", "locked", "home", "_hash")
+
+    def __init__(
+        self,
+        pos: bytes,
+        locked: int,
+        home: tuple[int, ...] = DEFAULT_HOMES,
+        grid: Optional[bytes] = None,
+    ):
+        self.pos = pos
+        self.locked = locked
+        self.home = home
+        self.grid = grid if grid is not None else _grid_for(pos)
+        self._hash: Optional[int] = None
+
+    @classmethod
+    def from_pieces(
+        cls,
+        pos: Sequence[Optional[int]],
+        locked: Sequence[bool],
+        home: tuple[int, ...] = DEFAULT_HOMES,
+    ) -> "BoardState":
+        """Build a state from per-seat ordinals (None if absent) and locked flags."""
+        mask = 0
+        for seat, flag in enumerate(locked):
+            # absent seats never carry a lock bit, so equal boards hash equal
+            if flag and pos[seat] is not None:
+                mask |= 1 << seat
+        return cls(bytes(NO_PIECE if o is None else o for o in pos), mask, home)
+
+    @classmethod
+    def initial(cls, colors: list[str]) -> "BoardState":
+        """All listed colours locked on their homes, other seats empty."""
+        seats = {seat_of(c) for c in colors}
+        pos = [DEFAULT_HOMES[s] if s in seats else None for s in range(NUM_SEATS)]
+        return cls.from_pieces(pos, [True] * NUM_SEATS)
+
+    def copy(self) -> "BoardState":
+        return self
+
+    def ordinal(self, seat: int) -> Optional[int]:
+        """Track ordinal of the seat's piece, or None if it has none."""
+        o = self.pos[seat]
+        return None if o == NO_PIECE else o
+
+    def is_locked(self, seat: int) -> bool:
+        return bool(self.locked >> seat & 1)
+
+    def occupant(self, ordinal: int) -> Optional[int]:
+        """Return the seat whose piece is on `ordinal`, if any."""
+        v = self.grid[CELL[ordinal]]
+        return v - 1 if v else None
+
+    def position(self, seat: int) -> Optional[tuple[int, int]]:
+        o = self.pos[seat]
+        return None if o == NO_PIECE else track.RING[o]
+
+    def seats(self) -> list[int]:
+        """Seats that have a piece on the board."""
+        return [s for s, o in enumerate(self.pos) if o != NO_PIECE]
+
+    def with_piece(self, seat: int, ordinal: int, locked: bool) -> "BoardState":
+        pos = bytearray(self.pos)
+        grid = bytearray(self.grid)
+        old = pos[seat]
+        if old != NO_PIECE:
+            grid[CELL[old]] = 0
+        pos[seat] = ordinal
+        grid[CELL[ordinal]] = seat + 1
+        return BoardState(
+            bytes(pos), _set_bit(self.locked, seat, locked), self.home, bytes(grid)
+        )
+
+    def with_locked(self, seat: int, locked: bool) -> "BoardState":
+        return BoardState(
+            self.pos, _set_bit(self.locked, seat, locked), self.home, self.grid
+        )
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, BoardState)
+            and self.pos == other.pos
+            and self.locked == other.locked
+            and self.home == other.home
+        )
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash((self.pos, self.locked, self.home))
+        return self._hash
+
+    def __repr__(self) -> str:
+        pos = [self.ordinal(s) for s in range(len(self.pos))]
+        return f"<BoardState pos={pos}, locked={self.locked:#06b}>"
+
+
+def _set_bit(mask: int, bit: int, value: bool) -> int:
+    return mask | (1 << bit) if value else mask & ~(1 << bit)
+
+
+def _grid_for(pos: bytes) -> bytes:
+    grid = bytearray(_EMPTY_GRID)
+    for seat, o in enumerate(pos):
+        if o != NO_PIECE:
+            grid[CELL[o]] = seat + 1
+    return bytes(grid)
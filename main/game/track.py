@@ -0,0 +1,122 @@
+"""
+Precomputed index of the perimeter track.
+
+The track runs counter-clockwise around the edge of the board starting at
+BLUE's home (0, 0): up the bottom side (x == 0), along the left side
+(y == BOARD_Y - 1), down the top side (x == BOARD_X - 1) and back along the
+right side (y == 0). Every question Board asks about the track (where does a
+roll land, how far apart are two cells, which cells are passed) becomes a
+table lookup instead of a side-by-side walk.
+"""
+
+from game.constants import BOARD_X, BOARD_Y
+
+_MAX_X = BOARD_X - 1
+_MAX_Y = BOARD_Y - 1
+
+# side perspective transformations (swap x/y, swap sign)
+BOTTOM = (False, False)
+LEFT = (True, True)
+TOP = (False, True)
+RIGHT = (True, False)
+
+
+def _build_ring() -> tuple[tuple[int, int], ...]:
+    ring: list[tuple[int, int]] = []
+    ring += [(0, y) for y in range(0, _MAX_Y)]  # bottom
+    ring += [(x, _MAX_Y) for x in range(0, _MAX_X)]  # left
+    ring += [(_MAX_X, y) for y in range(_MAX_Y, 0, -1)]  # top
+    ring += [(x, 0) for x in range(_MAX_X, 0, -1)]  # right
+    return tuple(ring)
+
+
+def _side_of(x: int, y: int) -> tuple[bool, bool]:
+    # corners belong to the side that leaves them in track order
+    if x == 0 and y < _MAX_Y:
+        return BOTTOM
+    elif x == _MAX_X and y > 0:
+        return TOP
+    elif y == 0 and x > 0:
+        return RIGHT
+    else:
+        return LEFT
+
+
+# ordinal -> position
+RING: tuple[tuple[int, int], ...] = _build_ring()
+TRACK_LENGTH: int = len(RING)
+# ring laid out twice so any run of up to one lap is a single slice
+_RING2 = RING + RING
+
+# position -> ordinal (-1 for cells off the track)
+ORDINAL: list[list[int]] = [[-1] * BOARD_Y for _ in range(BOARD_X)]
+for _i, (_x, _y) in enumerate(RING):
+    ORDINAL[_x][_y] = _i
+
+# per-cell side perspective transformation and corner flag
+SIDE: list[list[tuple[bool, bool]]] = [
+    [_side_of(x, y) for y in range(BOARD_Y)] for x in range(BOARD_X)
+]
+CORNERS: tuple[tuple[int, int], ...] = (
+    (0, 0),
+    (0, _MAX_Y),
+    (_MAX_X, _MAX_Y),
+    (_MAX_X, 0),
+)
+CORNER: list[list[bool]] = [[False] * BOARD_Y for _ in range(BOARD_X)]
+for _x, _y in CORNERS:
+    CORNER[_x][_y] = True
+
+# ordinal -> True if the cell is a corner (a track segment ends there)
+CORNER_ORDINAL: tuple[bool, ...] = tuple(CORNER[x][y] for x, y in RING)
+
+
+def ordinal(pos: tuple[int, int]) -> int:
+    """Return the track ordinal of a position, raising if it is off the track."""
+    o = ORDINAL[pos[0]][pos[1]]
+    if o < 0:
+        raise ValueError(f"position {pos} is not on the track")
+    return o
+
+
+def step(pos: tuple[int, int], roll: int) -> tuple[int, int]:
+    """Return the position reached by moving `roll` cells along the track."""
+    return RING[(ordinal(pos) + roll) % TRACK_LENGTH]
+
+
+def distance(start: tuple[int, int], stop: tuple[int, int]) -> int:
+    """Return the number of forward steps from start to stop."""
+    return (ordinal(stop) - ordinal(start)) % TRACK_LENGTH
+
+
+def path(pos: tuple[int, int], roll: int) -> list[tuple[int, int]]:
+    """Return the cells entered when moving `roll` cells, target included."""
+    o = ordinal(pos)
+    return list(_RING2[o + 1 : o + roll + 1])
+
+
+def segments(pos: tuple[int, int], roll: int) -> list[int]:
+    """
+    Split a move of `roll` cells into straight runs, breaking at every corner.
+    Returns the length of each run in order.
+    """
+    o = ordinal(pos)
+    runs: list[int] = []
+    run = 0
+    for i in range(1, roll + 1):
+        run += 1
+        if CORNER_ORDINAL[(o + i) % TRACK_LENGTH] and i < roll:
+            runs.append(run)
+            run = 0
+    if run:
+        runs.append(run)
+    return runs
+
+
+def side(pos: tuple[int, int]) -> tuple[bool, bool]:
+    """Return the side perspective transformation (swap x/y, swap sign) of a cell."""
+    return SIDE[pos[0]][pos[1]]
+
+
+def on_corner(pos: tuple[int, int]) -> bool:
+    return CORNER[pos[0]][pos[1]]
@@ -0,0 +1,96 @@
+"""
+Zobrist hashing of board positions and a memo of per-position move analysis.
+
+A board hash is the XOR of one random 64-bit key per (seat, cell) occupied,
+one per locked seat and one per (seat, home cell). Moving a piece or flipping
+a lock XORs the old key out and the new key in, so Board keeps its hash up to
+date in O(1) on every low_level_move and capture.
+"""
+
+import random
+from collections import OrderedDict
+from typing import Optional
+from game.constants import BOARD_X, BOARD_Y
+from game.state import NUM_SEATS
+
+_CELLS = BOARD_X * BOARD_Y
+_rng = random.Random(0x7A0B)
+
+# seat -> cell index -> key
+PIECE: tuple[tuple[int, ...], ...] = tuple(
+    tuple(_rng.getrandbits(64) for _ in range(_CELLS)) for _ in range(NUM_SEATS)
+)
+LOCK: tuple[int, ...] = tuple(_rng.getrandbits(64) for _ in range(NUM_SEATS))
+HOME: tuple[tuple[int, ...], ...] = tuple(
+    tuple(_rng.getrandbits(64) for _ in range(_CELLS)) for _ in range(NUM_SEATS)
+)
+
+
+def piece_key(seat: int, pos: tuple[int, int]) -> int:
+    return PIECE[seat][pos[0] * BOARD_Y + pos[1]]
+
+
+def move_key(seat: int, start: tuple[int, int], target: tuple[int, int]) -> int:
+    """XOR this into a hash to move a seat's piece from start to target."""
+    return piece_key(seat, start) ^ piece_key(seat, target)
+
+
+def hash_pieces(pieces) -> int:
+    """Full hash of (seat, pos, locked, home) tuples."""
+    h = 0
+    for seat, pos, locked, home in pieces:
+        h ^= piece_key(seat, pos) ^ HOME[seat][home[0] * BOARD_Y + home[1]]
+        if locked:
+            h ^= LOCK[seat]
+    return h
+
+
+class MoveAnalysis:
+    """
+    What a roll means on one board position: the move description
+    get_move_desc returns and the blockers Board must clear for the path.
+    """
+
+    __slots__ = ("desc", "scenario", "blockers")
+
+    def __init__(
+        self,
+        desc: Optional[tuple[tuple[int, int], tuple[int, int]]],
+        scenario: Optional[str],
+        blockers: tuple[tuple[int, int], ...],
+    ):
+        self.desc = desc
+        # "alpha", "A", "F", "corner", or None if Board can't clear the path
+        self.scenario = scenario
+        self.blockers = blockers  # blocker positions in path order
+
+
+class MoveCache:
+    """LRU-bounded map from (board hash, seat, roll) to MoveAnalysis."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple[int, int, int], MoveAnalysis] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple[int, int, int]) -> Optional[MoveAnalysis]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple[int, int, int], entry: MoveAnalysis) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
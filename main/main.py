@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
-from game.game import Game
+from game.async_game import AsyncGame
 import RPi.GPIO as GPIO
 
 
 def run() -> None:
     GPIO.setmode(GPIO.BOARD)
-    game = Game()
+    game = AsyncGame()
     game.run()
     GPIO.cleanup()
 